@@ -2,6 +2,11 @@ from flask import Flask
 
 from .config import config
 from .extensions import db, ma, cors, migrate
+from .metrics import init_metrics
+from .profiling import init_profiling
+from .utils.compression import init_compression
+from .utils.json_provider import init_json_provider
+from .utils.replica import init_replica
 
 def create_app(config_name='default'):
     """
@@ -13,7 +18,12 @@ def create_app(config_name='default'):
     app.config.from_object(config[config_name])
 
     # 2. Initialize extensions
+    init_json_provider(app)
+    init_metrics(app)
+    init_profiling(app)
+    init_compression(app)
     db.init_app(app)
+    init_replica(app)
     ma.init_app(app)
     
     # Use the CORS origins from config
@@ -27,4 +37,14 @@ def create_app(config_name='default'):
     from .api import api as api_blueprint
     app.register_blueprint(api_blueprint, url_prefix='/api/v1')
 
+    # 4. Background tagging workers (started with the first request) and tagger backends
+    from .services.tagging_queue import tagging_queue
+    tagging_queue.init_app(app)
+    from .services.tagger_registry import init_taggers
+    init_taggers(app)
+
+    # 5. CLI commands (flask retag-vocabulary, ...)
+    from .cli import register_commands
+    register_commands(app)
+
     return app
\ No newline at end of file
@@ -1,5 +1,12 @@
+import datetime
+
 from app.extensions import db
 
+
+def utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
 # Association table for the Many-to-Many relationship
 # NOTE: The table name is set to "grant_tags" here.
 # The ForeignKeys MUST point to the new table names: 'grants.id' and 'tags.id'
@@ -7,6 +14,8 @@ grant_tags = db.Table(
     "grant_tags",
     db.Column("grant_id", db.Integer, db.ForeignKey("grants.id"), primary_key=True),
     db.Column("tag_id", db.Integer, db.ForeignKey("tags.id"), primary_key=True),
+    # Reverse of the (grant_id, tag_id) PK: used to find the grants of a tag
+    db.Index("ix_grant_tags_tag_id_grant_id", "tag_id", "grant_id"),
 )
 
 
@@ -16,12 +25,21 @@ class Grant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=False)
+    # Bumped whenever the grant or its tags change (ETag of GET /grants/<id>).
+    # Server defaults cover the raw SQL bulk loads (COPY merge, benchmarks).
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, default=utcnow, server_default=db.func.current_timestamp()
+    )
 
     # Many-to-Many relationship
+    # "selectin" loads the tags of many grants with one IN (...) query,
+    # instead of re-running the parent query as a subquery
     tags = db.relationship(
         "Tag",
         secondary=grant_tags,
-        lazy="subquery",
+        lazy="selectin",
+        order_by="Tag.id",
         backref=db.backref("grants", lazy=True),
     )
 
@@ -36,4 +54,103 @@ class Tag(db.Model):
     name = db.Column(db.String(100), unique=True, nullable=False)
 
     def __repr__(self):
-        return f"<Tag {self.name}>"
\ No newline at end of file
+        return f"<Tag {self.name}>"
+
+class TaggingJob(db.Model):
+    __tablename__ = 'tagging_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # pending -> running -> completed
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow)
+    # Also works as a heartbeat: bumped after every processed chunk
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+
+    def __repr__(self):
+        return f"<TaggingJob {self.id} {self.status}>"
+
+
+class TaggingJobItem(db.Model):
+    __tablename__ = 'tagging_job_items'
+
+    job_id = db.Column(db.Integer, db.ForeignKey("tagging_jobs.id"), primary_key=True)
+    grant_id = db.Column(db.Integer, db.ForeignKey("grants.id"), primary_key=True)
+    # pending -> done | failed
+    status = db.Column(db.String(20), nullable=False, default="pending")
+
+    __table_args__ = (
+        db.Index("ix_tagging_job_items_job_id_status", "job_id", "status"),
+    )
+
+    def __repr__(self):
+        return f"<TaggingJobItem {self.job_id}/{self.grant_id} {self.status}>"
+
+
+class CacheEntry(db.Model):
+    """Shared key/value cache (see app.utils.cache.SQLCache)."""
+    __tablename__ = 'cache_entries'
+
+    namespace = db.Column(db.String(50), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<CacheEntry {self.namespace}:{self.key}>"
+
+
+class TagCount(db.Model):
+    """
+    Number of grants per tag, kept up to date by the tagging pipeline
+    (see app.services.tag_facets) instead of a GROUP BY over grant_tags.
+    """
+    __tablename__ = 'tag_counts'
+
+    tag_id = db.Column(db.Integer, db.ForeignKey("tags.id"), primary_key=True)
+    grant_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TagCount {self.tag_id}={self.grant_count}>"
+
+
+class DataVersion(db.Model):
+    """
+    Global change counters (see app.services.data_version), used as the
+    ETag / Last-Modified of collection endpoints.
+    """
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow)
+
+    def __repr__(self):
+        return f"<DataVersion {self.name}={self.version}>"
+
+
+class TagVocabulary(db.Model):
+    """
+    Tag lists applied to the corpus, newest last (see app.services.vocabulary_retag).
+    A 'retagging' row is a diff being applied; its checkpoint lets an
+    interrupted run resume.
+    """
+    __tablename__ = 'tag_vocabularies'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(16), nullable=False)
+    # JSON lists of tag names: the whole vocabulary and its diff with the previous one
+    tags = db.Column(db.Text, nullable=False)
+    added = db.Column(db.Text, nullable=False, default="[]")
+    removed = db.Column(db.Text, nullable=False, default="[]")
+    # retagging -> applied | superseded
+    status = db.Column(db.String(20), nullable=False, default="retagging", index=True)
+    # Last grant ID scanned for the added tags
+    checkpoint_grant_id = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+
+    def __repr__(self):
+        return f"<TagVocabulary {self.id} {self.version} {self.status}>"
@@ -1,60 +1,28 @@
-from threading import Thread
 import traceback
-from flask import request, current_app, abort
+from flask import request, current_app, abort, url_for, stream_with_context
 from . import api
-from .models import Grant, Tag, grant_tags
+from .models import Grant, TagCount, TaggingJob, TaggingJobItem, grant_tags
 from .schemas import (
     grants_input_schema, 
-    grants_output_schema,
-    grant_output_schema
+    tagging_job_output_schema
 )
 from app.extensions import db
-from app.services.tagging_service import tag_grant
+from app.services.grant_ingest import ingest_grant_stream, insert_new_grants
+from app.services.data_version import bump_data_version, get_data_version, get_grant_version
+from app.services.grant_export import EXPORT_FORMATS, iter_export
+from app.services.grant_reader import grant_row_to_dict, with_grant_columns
+from app.services.grant_filters import apply_grant_filters
+from app.services.query_cache import get_query_cache, grants_query_key, store_query_result
+from app.services.tag_cache import get_tag_cache, vocabulary_version
+from app.services.tag_facets import filtered_tag_facets, global_tag_facets
+from app.services.tagging_queue import tagging_queue
 from app.utils.api_response import success_response
+from app.utils.conditional import not_modified, validator_headers
+from app.utils.json_stream import iter_json_array, iter_ndjson
+from app.utils.pagination import COUNT_MODES, count_rows, decode_cursor, encode_cursor, total_pages
+from app.utils.replica import use_replica
 
-def run_background_tagging(app, grant_ids):
-    """
-    This function runs in a separate thread.
-    It iterates over the grant IDs, calls the LLM, and updates the DB.
-    """
-    with app.app_context():  # --- ! VERY IMPORTANT: Create an app context in the thread
-        current_app.logger.info(f"[BG-TASK] Starting tagging for {len(grant_ids)} grants.")
-        
-        for grant_id in grant_ids:
-            try:
-                # Get the grant within the context
-                grant = Grant.query.get(grant_id)
-                if not grant:
-                    current_app.logger.warning(f"[BG-TASK] Grant {grant_id} not found for tagging.")
-                    continue
-
-                current_app.logger.debug(f"[BG-TASK] Tagging grant: {grant.name}")
-                
-                # --- The slow LLM call ---
-                tag_names = tag_grant(
-                    description=grant.description,
-                    name=grant.name
-                )
-                
-                # Get or create Tag objects
-                tag_objects = []
-                for name in tag_names:
-                    tag = Tag.query.filter_by(name=name).first()
-                    if not tag:
-                        tag = Tag(name=name)
-                        db.session.add(tag)
-                    tag_objects.append(tag)
-                
-                # Assign tags and save
-                grant.tags = tag_objects
-                db.session.commit()
-                current_app.logger.info(f"[BG-TASK] Grant {grant_id} tagged successfully.")
-
-            except Exception as e:
-                db.session.rollback()
-                current_app.logger.error(f"[BG-TASK] Failed to tag grant {grant_id}: {e}", exc_info=True)
-        
-        current_app.logger.info(f"[BG-TASK] Tagging process finished.")
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
 
 @api.route('/health', methods=['GET'])
 def health_check():
@@ -62,75 +30,171 @@ def health_check():
     return success_response({"status": "healthy"}, "Health check successful", 200)
 
 @api.route('/grants', methods=['GET'])
+@use_replica
 def get_grants():
     """
     Gets all grants with pagination and filtering.
     Supports:
     - Multiple tags: /api/grants?tag=agriculture&tag=rural
-    - Partial name: /api/grants?name=sustainable
+    - Partial name: /api/grants?name=sustainable (trigram-indexed on PostgreSQL)
+    - Full-text search over name + description, best matches first:
+      /api/grants?q=soil health
     - Pagination: /api/grants?page=0&size=20
+    - Cursor (keyset) pagination: /api/grants?cursor=&size=20, then
+      /api/grants?cursor=<nextCursor>. No OFFSET scan, however deep the page.
+    - Counting: count=exact (default) | estimate | none
     """
     # --- 1. Get query parameters ---
     
     # Pagination params (0-indexed)
     page = request.args.get('page', 0, type=int)
     size = request.args.get('size', 20, type=int)
+    cursor = request.args.get('cursor') # None = offset mode, '' = first cursor page
+    count_mode = request.args.get('count', 'exact')
+
+    if count_mode not in COUNT_MODES:
+        abort(400, description="Invalid pagination parameters.")
+    # Same leniency as Flask-SQLAlchemy's paginate(error_out=False)
+    page = max(page, 0)
+    size = size if size > 0 else 20
     
     # Filter params
     tag_filters = request.args.getlist('tag')
     name_filter = request.args.get('name')
+    search_text = (request.args.get('q') or '').strip()
 
-    query = Grant.query
+    if search_text and cursor is not None:
+        abort(400, description="Cursor pagination is not supported together with 'q'.")
 
-    # --- 2. Apply filters ---
-    if name_filter:
-        query = query.filter(Grant.name.ilike(f'%{name_filter}%'))
+    # Polling clients: answer 304 before running any query on grants
+    version, last_modified = get_data_version()
+    etag = f"grants-{version}"
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    # Repeated queries: serve the page from the result cache (keyed by data version)
+    query_cache = get_query_cache()
+    if query_cache is not None:
+        cache_key = grants_query_key(version, {
+            "tags": tag_filters, "name": name_filter, "q": search_text,
+            "page": page, "cursor": cursor, "size": size, "count": count_mode,
+        })
+        page_data = query_cache.get(cache_key)
+        if page_data is not None:
+            body, status_code = success_response(page_data, "Grants retrieved successfully", 200)
+            return body, status_code, validator_headers(etag, last_modified)
 
-    if tag_filters:
-        # Find grants that have ALL specified tags
-        query = query.join(Grant.tags).filter(Tag.name.in_(tag_filters))
-        query = query.group_by(Grant.id).having(db.func.count(Tag.id) == len(tag_filters))
+    # --- 2. Apply filters ---
+    query, rank_order = apply_grant_filters(Grant.query, name_filter, tag_filters, search_text)
 
     # --- 3. Apply Pagination ---
-    # We add 1 to the page because Flask-SQLAlchemy's paginate is 1-indexed,
-    # but our API standard is 0-indexed.
-    try:
-        paginated_result = query.order_by(Grant.name.asc()).paginate(
-            page=page + 1, 
-            per_page=size, 
-            error_out=False # Returns empty list if page is out of range
-        )
-    except Exception as e:
-        current_app.logger.error(f"Pagination error: {e}\n{traceback.format_exc()}")
-        abort(400, description="Invalid pagination parameters.")
+    total = count_rows(query.statement, count_mode)
 
+    if cursor is not None:
+        # Keyset: continue right after the last (name, id) seen
+        if cursor:
+            try:
+                last_name, last_id = decode_cursor(cursor, (str, int))
+            except ValueError:
+                abort(400, description="Invalid cursor.")
+            query = query.filter(db.tuple_(Grant.name, Grant.id) > db.tuple_(last_name, last_id))
+        page_query = query.order_by(Grant.name.asc(), Grant.id.asc())
+    else:
+        page_query = query.order_by(*rank_order, Grant.name.asc(), Grant.id.asc()).offset(page * size)
+
+    # Fetch one extra row to know whether there is a next page without counting.
+    # Plain rows (tags aggregated in the same statement), no ORM objects.
+    items = with_grant_columns(page_query).limit(size + 1).all()
+    has_next = len(items) > size
+    items = items[:size]
 
     # --- 4. Serialize and Format Response ---
-    serialized_content = grants_output_schema.dump(paginated_result.items)
+    serialized_content = [grant_row_to_dict(row) for row in items]
     
     # Build the standardized Page<T> object
     page_data = {
         "content": serialized_content,
-        "pageNo": page, # Return the 0-indexed page number
-        "pageSize": paginated_result.per_page,
-        "totalElements": paginated_result.total,
-        "totalPages": paginated_result.pages,
-        "last": not paginated_result.has_next
+        "pageNo": page if cursor is None else None, # Return the 0-indexed page number
+        "pageSize": size,
+        "totalElements": total,
+        "totalPages": total_pages(total, size),
+        "last": not has_next,
+        "nextCursor": encode_cursor(items[-1].name, items[-1].id) if has_next else None
     }
-    
-    return success_response(page_data, "Grants retrieved successfully", 200)
+
+    body, status_code = success_response(page_data, "Grants retrieved successfully", 200)
+    if query_cache is not None:
+        # Sized by the bytes served, without encoding the page a second time
+        store_query_result(query_cache, version, cache_key, page_data, body.content_length)
+    return body, status_code, validator_headers(etag, last_modified)
+
+@api.route('/grants/export', methods=['GET'])
+@use_replica
+def export_grants():
+    """
+    Streams every grant matching the filters, with its tags, in one response.
+    Supports the same filters as GET /grants (tag, name, q) and:
+    - format=ndjson (default): one JSON grant per line
+    - format=csv: id,name,description,tags (tags separated by '|')
+    Grants are read from a server-side cursor and sent with chunked transfer
+    encoding: no COUNT, no OFFSET, flat memory.
+    """
+    # --- 1. Get query parameters ---
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        abort(400, description=f"Invalid format. Expected one of: {', '.join(EXPORT_FORMATS)}.")
+
+    tag_filters = request.args.getlist('tag')
+    name_filter = request.args.get('name')
+    search_text = (request.args.get('q') or '').strip()
+
+    # --- 2. Apply filters ---
+    query, rank_order = apply_grant_filters(Grant.query, name_filter, tag_filters, search_text)
+
+    # --- 3. Stream the rows ---
+    def generate():
+        sent = 0
+        try:
+            for chunk in iter_export(query, export_format, rank_order):
+                sent += 1
+                yield chunk
+        except Exception as e:
+            # Headers are already sent: log and cut the response short
+            current_app.logger.error(f"Error exporting grants after {sent} chunks: {e}", exc_info=True)
+            raise
+
+    return current_app.response_class(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename=grants.{export_format}"},
+    )
 
 @api.route('/grants/<int:grant_id>', methods=['GET'])
+@use_replica
 def get_grant(grant_id):
     """
     Gets a single grant by its ID.
     """
-    # get_or_404 is a shortcut to get by ID or abort with a 404
-    # if not found. Our global error handler will catch the 404.
-    grant = Grant.query.get_or_404(grant_id)
+    # Abort with a 404 if not found. Our global error handler will catch the 404.
+    grant_version = get_grant_version(grant_id)
+    if grant_version is None:
+        abort(404)
+
+    # Primary key lookup of the version only; the tags are not loaded for a 304
+    version, last_modified = grant_version
+    etag = f"grant-{grant_id}-{version}"
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    row = with_grant_columns(Grant.query.filter(Grant.id == grant_id)).first()
+    if row is None:
+        abort(404)
     
-    data = grant_output_schema.dump(grant)
-    return success_response(data, "Grant retrieved successfully", 200)
+    data = grant_row_to_dict(row)
+    body, status_code = success_response(data, "Grant retrieved successfully", 200)
+    return body, status_code, validator_headers(etag, last_modified)
 
 @api.route('/grants', methods=['POST'])
 def add_grants():
@@ -138,6 +202,11 @@ def add_grants():
     Adds a list of new grants to the system.
     Tagging is processed in the background.
     """
+    # Backpressure: refuse new work while the tagging queue is saturated
+    if tagging_queue.is_full():
+        current_app.logger.warning("Tagging queue is full, rejecting upload.")
+        abort(503, description="The tagging queue is full. Please retry later.")
+
     json_data = request.get_json()
     if not json_data:
         abort(400, description="No input data provided")
@@ -146,62 +215,152 @@ def add_grants():
     validated_data = grants_input_schema.load(json_data)
     current_app.logger.debug(f"Validated {len(validated_data)} grants.")
 
-    new_grants_list = []
-    grant_ids_to_tag = [] # --- 3. List of IDs for the background thread
-    
-    for grant_data in validated_data:
-        if Grant.query.filter_by(name=grant_data['name']).first():
-            current_app.logger.debug(f"Skipping duplicate grant: {grant_data['name']}")
-            continue 
+    # --- 3. Detect duplicates and insert the new grants in bulk (WITHOUT tags) ---
+    # The tagging job is stored in the same transaction: grants never exist without one
+    job = None
+    try:
+        new_grants_list, skipped_names = insert_new_grants(validated_data)
+        grant_ids_to_tag = [grant['id'] for grant in new_grants_list] # IDs for the background workers
+        if grant_ids_to_tag:
+            job = tagging_queue.create_job(grant_ids_to_tag)
 
-        current_app.logger.debug(f"Processing new grant: {grant_data['name']}")
-        
-        # --- 4. Create the grant WITHOUT tags ---
-        new_grant = Grant(
-            name=grant_data['name'],
-            description=grant_data['description'],
-            tags=[]  # Created with an empty list
+        db.session.commit() # Commit the new grants and their job
+        current_app.logger.info(
+            f"Successfully created {len(new_grants_list)} grants (untagged), "
+            f"skipped {len(skipped_names)} duplicates."
         )
-        db.session.add(new_grant)
-        new_grants_list.append(new_grant)
+        if skipped_names:
+            current_app.logger.debug(f"Skipped duplicate grants: {skipped_names}")
 
-    # --- 5. Save grants to get their IDs ---
-    try:
-        # We 'flush' to get IDs without closing the transaction
-        db.session.flush() 
-        for grant in new_grants_list:
-            grant_ids_to_tag.append(grant.id) # Save the new IDs
-        
-        db.session.commit() # Commit the new grants
-        current_app.logger.info(f"Successfully created {len(new_grants_list)} grants (untagged).")
-    
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error saving grants to DB: {e}\n{traceback.format_exc()}")
         abort(500, description="Internal error while saving grants")
 
-    # --- 6. Start the background thread ---
-    if grant_ids_to_tag:
-        current_app.logger.info(f"Starting background tagging thread for {len(grant_ids_to_tag)} grants.")
-        # Pass the real 'app' object and the list of IDs
-        thread = Thread(
-            target=run_background_tagging, 
-            args=(current_app._get_current_object(), grant_ids_to_tag)
+    # --- 4. Hand the tagging job to the worker pool ---
+    if job is not None:
+        current_app.logger.info(f"Queued tagging job {job.id} for {len(grant_ids_to_tag)} grants.")
+        tagging_queue.submit(job.id)
+
+    # --- 5. Respond immediately ---
+    # New grants have no tags yet, so there is no need to go through the ORM schema
+    data = [{**grant, "tags": []} for grant in new_grants_list]
+    message = f"{len(new_grants_list)} grants created, {len(skipped_names)} duplicates skipped."
+    if job is None:
+        return success_response(data, message, 201)
+
+    body, status_code = success_response(data, f"{message} Tagging job {job.id} queued.", 201)
+    return body, status_code, {"Location": url_for('api.get_job', job_id=job.id)}
+
+@api.route('/grants/stream', methods=['POST'])
+def stream_grants():
+    """
+    Adds grants from a large upload, parsed and loaded while it is read:
+    - NDJSON (Content-Type: application/x-ndjson): one grant per line
+    - JSON array (Content-Type: application/json): same body as POST /grants
+    Invalid records are skipped and reported instead of failing the upload.
+    Tagging is processed in the background.
+    """
+    # Backpressure: refuse new work while the tagging queue is saturated
+    if tagging_queue.is_full():
+        current_app.logger.warning("Tagging queue is full, rejecting upload.")
+        abort(503, description="The tagging queue is full. Please retry later.")
+
+    # --- 1. Parse the body incrementally (never request.get_json()) ---
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = iter_ndjson(request.stream)
+    elif request.mimetype == "application/json":
+        records = iter_json_array(
+            request.stream,
+            read_size=current_app.config['STREAM_INGEST_READ_SIZE'],
+            max_item_size=current_app.config['STREAM_INGEST_MAX_ITEM_SIZE'],
         )
-        thread.daemon = True  # Allows the app to exit even if the thread is running
-        thread.start()
+    else:
+        abort(415, description="Expected an application/x-ndjson or application/json body.")
 
-    # --- 7. Respond immediately ---
-    data = grants_output_schema.dump(new_grants_list)
-    return success_response(data, f"{len(new_grants_list)} grants created. Tagging started in background.", 201)
+    # --- 2. Validate record by record and load in chunks ---
+    try:
+        report = ingest_grant_stream(records)
+    except Exception as e:
+        current_app.logger.error(f"Error streaming grants to DB: {e}\n{traceback.format_exc()}")
+        abort(500, description="Internal error while saving grants")
+
+    current_app.logger.info(
+        f"Stream ingest: {report['received']} records, {report['created']} created, "
+        f"{report['skipped']} duplicates skipped, {report['invalid']} invalid."
+    )
+
+    # --- 3. Hand the tagging job to the worker pool ---
+    message = (
+        f"{report['created']} grants created, {report['skipped']} duplicates skipped, "
+        f"{report['invalid']} invalid records."
+    )
+    if report['truncated']:
+        message += " The upload could not be parsed to the end."
+    if report['jobId'] is None:
+        return success_response(report, message, 200)
+
+    tagging_queue.submit(report['jobId'])
+    body, status_code = success_response(report, f"{message} Tagging job {report['jobId']} queued.", 201)
+    return body, status_code, {"Location": url_for('api.get_job', job_id=report['jobId'])}
 
 @api.route('/tags', methods=['GET'])
+@use_replica
 def get_all_tags():
     """
     Returns the list of all predefined tags.
     """
     tags_list = current_app.config['PREDEFINED_TAGS']
-    return success_response(sorted(tags_list), "Tags retrieved successfully", 200)
+
+    # The list only changes with the configuration
+    etag = f"tags-{vocabulary_version(tags_list)}"
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    body, status_code = success_response(sorted(tags_list), "Tags retrieved successfully", 200)
+    return body, status_code, validator_headers(etag)
+
+
+@api.route('/tags/facets', methods=['GET'])
+def get_tag_facets():
+    """
+    Returns the number of grants of each tag, most used first:
+    [{"name": "rural", "count": 1234}, ...]
+    - Without filters: every tag, from the tag_counts summary table
+    - With the filters of GET /grants (tag, name, q): only the tags of the
+      matching grants, e.g. /api/tags/facets?tag=rural for the tags that
+      co-occur with 'rural'
+    """
+    tag_filters = request.args.getlist('tag')
+    name_filter = request.args.get('name')
+    search_text = (request.args.get('q') or '').strip()
+
+    version, last_modified = get_data_version()
+    etag = f"facets-{version}"
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    if not (tag_filters or name_filter or search_text):
+        facets = global_tag_facets()
+    else:
+        query, _ = apply_grant_filters(Grant.query, name_filter, tag_filters, search_text)
+        facets = filtered_tag_facets(query)
+
+    body, status_code = success_response(facets, "Tag facets retrieved successfully", 200)
+    return body, status_code, validator_headers(etag, last_modified)
+
+
+@api.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Returns the hit/miss counters of the caches of this process
+    (null when a cache is disabled).
+    """
+    caches = {"tagging": get_tag_cache(), "grantsQuery": get_query_cache()}
+    data = {name: cache.stats() if cache is not None else None for name, cache in caches.items()}
+    return success_response(data, "Cache stats retrieved successfully", 200)
 
 
 @api.route('/grants/clear-all', methods=['DELETE'])
@@ -215,12 +374,16 @@ def clear_all_grants():
         abort(403, description="This operation is only allowed in the development environment.")
 
     try:
-        # --- FIX: Delete from the association table FIRST ---
+        # --- FIX: Delete from the association tables FIRST ---
         # This prevents the ForeignKeyViolation
         db.session.execute(grant_tags.delete())
+        db.session.execute(TagCount.__table__.delete())
+        db.session.execute(TaggingJobItem.__table__.delete())
+        TaggingJob.query.delete()
         
         # Now we can safely delete all grants
         num_deleted = Grant.query.delete()
+        bump_data_version()
         
         db.session.commit()
         current_app.logger.info(f"Successfully deleted {num_deleted} grants and cleared grant_tags.")
@@ -228,4 +391,15 @@ def clear_all_grants():
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error clearing grants: {e}\n{traceback.format_exc()}")
-        abort(500, description="Internal error while clearing grants.")
\ No newline at end of file
+        abort(500, description="Internal error while clearing grants.")
+
+
+@api.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Gets the status and progress of a tagging job.
+    """
+    job = TaggingJob.query.get_or_404(job_id)
+
+    data = tagging_job_output_schema.dump(job)
+    return success_response(data, "Job retrieved successfully", 200)
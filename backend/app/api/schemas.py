@@ -1,5 +1,5 @@
 from app.extensions import ma
-from app.api.models import Grant, Tag
+from app.api.models import Grant, Tag, TaggingJob
 from marshmallow import fields
 
 
@@ -34,9 +34,28 @@ class GrantOutputSchema(ma.SQLAlchemyAutoSchema):
         return [tag.name for tag in obj.tags]
 
 
+# Esquema para serializar el estado de un job de tagging
+class TaggingJobOutputSchema(ma.SQLAlchemyAutoSchema):
+    createdAt = fields.DateTime(attribute="created_at")
+    updatedAt = fields.DateTime(attribute="updated_at")
+    # Porcentaje de grants ya procesados (tagged o failed)
+    progress = fields.Method("get_progress")
+
+    class Meta:
+        model = TaggingJob
+        fields = ("id", "status", "total", "processed", "failed", "progress", "createdAt", "updatedAt")
+
+    def get_progress(self, obj):
+        if not obj.total:
+            return 100.0
+        return round(100.0 * (obj.processed + obj.failed) / obj.total, 2)
+
+
 # Instancias de los esquemas para usarlos
 grant_input_schema = GrantInputSchema()
 grants_input_schema = GrantInputSchema(many=True)  # Para una lista de grants
 
 grant_output_schema = GrantOutputSchema()
 grants_output_schema = GrantOutputSchema(many=True)
+
+tagging_job_output_schema = TaggingJobOutputSchema()
@@ -0,0 +1,59 @@
+import click
+from flask.cli import with_appcontext
+
+from app.api.models import Grant
+from app.services.bulk_retag import run_bulk_retag
+from app.services.grant_filters import apply_grant_filters
+from app.services.tagger_registry import TAGGERS
+from app.services.vocabulary_retag import retag_vocabulary, vocabulary_diff
+
+
+@click.command("retag-vocabulary")
+@click.option("--batch-size", type=int, default=None, help="Grants scanned per checkpoint (default: RETAG_BATCH_SIZE).")
+@click.option("--dry-run", is_flag=True, help="Only print the difference with the applied vocabulary.")
+@with_appcontext
+def retag_vocabulary_command(batch_size, dry_run):
+    """Re-tags the corpus after a change of PREDEFINED_TAGS (added/removed tags only)."""
+    if dry_run:
+        diff = vocabulary_diff()
+        click.echo(f"Applied vocabulary: {diff['appliedVersion']}, current: {diff['version']}")
+        click.echo(f"Added: {diff['added']}")
+        click.echo(f"Removed: {diff['removed']}")
+        if diff["pending"] is not None:
+            click.echo(
+                f"Interrupted run for {diff['pending'].version} "
+                f"(checkpoint: grant {diff['pending'].checkpoint_grant_id})"
+            )
+        return
+
+    retag_vocabulary(batch_size=batch_size, log=click.echo)
+
+
+@click.command("retag")
+@click.option("--tag", "tags", multiple=True, help="Only grants with this tag (repeatable, like GET /grants).")
+@click.option("--name", default=None, help="Only grants whose name contains this text.")
+@click.option("--q", default=None, help="Only grants matching this full-text search.")
+@click.option("--method", type=click.Choice(sorted(TAGGERS)), default="simple", show_default=True)
+@click.option("--chunk-size", type=int, default=None, help="Grants per chunk (default: RETAG_BATCH_SIZE).")
+@click.option("--workers", type=int, default=None, help="Tagging processes for 'simple' (default: all cores).")
+@click.option("--dry-run", is_flag=True, help="Tag without writing; only count the grants that would change.")
+@with_appcontext
+def retag_command(tags, name, q, method, chunk_size, workers, dry_run):
+    """Re-tags existing grants in bulk, in parallel processes."""
+    query, _ = apply_grant_filters(Grant.query, name, list(tags), (q or "").strip())
+    report = run_bulk_retag(
+        query, method=method, chunk_size=chunk_size, workers=workers, dry_run=dry_run, log=click.echo
+    )
+
+    verb = "would change" if dry_run else "changed"
+    click.echo(
+        f"Re-tagged {report['grants']} grants in {report['seconds']}s "
+        f"({report['grants'] / max(report['seconds'], 1e-9):.0f} grants/s): "
+        f"{report['changed']} {verb}, {report['failed']} failed."
+    )
+
+
+def register_commands(app):
+    """Registers the maintenance commands on `flask`."""
+    app.cli.add_command(retag_vocabulary_command)
+    app.cli.add_command(retag_command)
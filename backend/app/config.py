@@ -1,6 +1,29 @@
 import os
 from app.services.predefined_tags import TAG_LIST
 
+def engine_options(url):
+    """
+    SQLAlchemy engine options from the DB_* environment variables.
+    Pool settings left unset keep SQLAlchemy's defaults (5 connections + 10 overflow).
+    """
+    options = {"pool_pre_ping": os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'}
+    for option, variable, cast in (
+        ("pool_size", 'DB_POOL_SIZE', int),
+        ("max_overflow", 'DB_MAX_OVERFLOW', int),
+        ("pool_timeout", 'DB_POOL_TIMEOUT', float),
+        ("pool_recycle", 'DB_POOL_RECYCLE', int),
+    ):
+        if os.environ.get(variable):
+            options[option] = cast(os.environ[variable])
+
+    # Per-statement limit (milliseconds, PostgreSQL only), set when each connection opens
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))
+    if statement_timeout and url and url.startswith(("postgresql", "postgres")):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    else:
+        options["connect_args"] = {}
+    return options
+
 class Config:
     """Configuración base."""
     FLASK_ENV = os.environ.get('FLASK_ENV', 'production')
@@ -8,16 +31,91 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    # Pool size / overflow / timeout / recycle / pre-ping and statement timeout (see engine_options)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Optional read replica: GET /grants, /grants/<id>, /grants/export and /tags read from it,
+    # except for clients that wrote in the last READ_YOUR_WRITES_SECONDS (sticky cookie)
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}}
+        if DATABASE_REPLICA_URL else {}
+    )
+    READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 10))
     
     CORS_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', '*').split(',')
 
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-    # Set the default tagging method ('simple' or 'llm')
+    # Any OpenAI-compatible server (e.g. a local mock); None means the official API
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')
+    OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
+    # Async LLM tagging: concurrent calls, provider rate limits, retries and timeouts
+    LLM_CONCURRENCY = int(os.environ.get('LLM_CONCURRENCY', 8))
+    LLM_REQUESTS_PER_MINUTE = int(os.environ.get('LLM_REQUESTS_PER_MINUTE', 500))
+    LLM_TOKENS_PER_MINUTE = int(os.environ.get('LLM_TOKENS_PER_MINUTE', 200000))
+    LLM_EXPECTED_OUTPUT_TOKENS = int(os.environ.get('LLM_EXPECTED_OUTPUT_TOKENS', 100))
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 5))
+    LLM_BACKOFF_BASE = float(os.environ.get('LLM_BACKOFF_BASE', 0.5))
+    LLM_BACKOFF_MAX = float(os.environ.get('LLM_BACKOFF_MAX', 30))
+    LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 30))
+    LLM_HTTP2 = os.environ.get('LLM_HTTP2', 'true').lower() == 'true'
+    # Batched LLM mode: several grants per prompt, answered as a {"<id>": [tags]} map
+    LLM_BATCH_MODE = os.environ.get('LLM_BATCH_MODE', 'false').lower() == 'true'
+    LLM_BATCH_TOKEN_BUDGET = int(os.environ.get('LLM_BATCH_TOKEN_BUDGET', 8000))
+    LLM_BATCH_MAX_GRANTS = int(os.environ.get('LLM_BATCH_MAX_GRANTS', 20))
+    # Set the default tagging method ('simple', 'llm' or any tagger registered in tagger_registry)
     TAGGING_METHOD = os.environ.get('TAGGING_METHOD', 'simple')
+    # Import and warm up the configured tagger at app creation (servers only, not `flask db ...` and other CLI commands)
+    TAGGER_WARMUP = os.environ.get('TAGGER_WARMUP', 'true').lower() == 'true'
+    # Number of grants loaded, tagged and committed together by the background tagger
+    TAGGING_CHUNK_SIZE = int(os.environ.get('TAGGING_CHUNK_SIZE', 500))
+    # Tagging job queue: worker threads per process (0 = run jobs inline, e.g. for tests),
+    # max jobs waiting in memory before uploads get a 503, and recovery of interrupted jobs
+    TAGGING_WORKERS = int(os.environ.get('TAGGING_WORKERS', 2))
+    TAGGING_QUEUE_MAXSIZE = int(os.environ.get('TAGGING_QUEUE_MAXSIZE', 100))
+    TAGGING_QUEUE_SUBMIT_TIMEOUT = float(os.environ.get('TAGGING_QUEUE_SUBMIT_TIMEOUT', 1))
+    TAGGING_QUEUE_POLL_INTERVAL = float(os.environ.get('TAGGING_QUEUE_POLL_INTERVAL', 5))
+    TAGGING_JOB_STALE_SECONDS = int(os.environ.get('TAGGING_JOB_STALE_SECONDS', 300))
+    # How often each process looks for stale jobs of dead processes (seconds)
+    TAGGING_RECOVERY_INTERVAL = float(os.environ.get('TAGGING_RECOVERY_INTERVAL', 60))
+    # Grants scanned (and checkpointed) per batch by `flask retag-vocabulary`
+    RETAG_BATCH_SIZE = int(os.environ.get('RETAG_BATCH_SIZE', 5000))
+    # Tagging result cache of paid/slow taggers ('llm'): 'memory' (per-process LRU), 'sql' (shared table) or 'none'
+    TAG_CACHE_BACKEND = os.environ.get('TAG_CACHE_BACKEND', 'memory')
+    TAG_CACHE_MAXSIZE = int(os.environ.get('TAG_CACHE_MAXSIZE', 100000))
+    TAG_CACHE_TTL = int(os.environ.get('TAG_CACHE_TTL', 0)) # Seconds, 0 = no expiry
+    # GET /grants result cache: 'memory' (per-process LRU capped in entries and bytes of JSON),
+    # 'sql' (shared cache_entries table) or 'none'. Entries are keyed by the grants data version.
+    QUERY_CACHE_BACKEND = os.environ.get('QUERY_CACHE_BACKEND', 'memory')
+    QUERY_CACHE_MAXSIZE = int(os.environ.get('QUERY_CACHE_MAXSIZE', 10000))
+    QUERY_CACHE_MAX_BYTES = int(os.environ.get('QUERY_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    QUERY_CACHE_TTL = int(os.environ.get('QUERY_CACHE_TTL', 0)) # Seconds, 0 = no expiry
+    # Max rows per multi-row INSERT / IN (...) list (keeps bound parameters under driver limits)
+    BULK_INSERT_CHUNK_SIZE = int(os.environ.get('BULK_INSERT_CHUNK_SIZE', 1000))
+    # Streaming ingest (POST /grants/stream): records loaded per chunk (COPY on PostgreSQL),
+    # max per-record errors reported, and read buffer / max item size for JSON arrays
+    STREAM_INGEST_CHUNK_SIZE = int(os.environ.get('STREAM_INGEST_CHUNK_SIZE', 5000))
+    STREAM_INGEST_MAX_ERRORS = int(os.environ.get('STREAM_INGEST_MAX_ERRORS', 100))
+    STREAM_INGEST_READ_SIZE = int(os.environ.get('STREAM_INGEST_READ_SIZE', 65536))
+    STREAM_INGEST_MAX_ITEM_SIZE = int(os.environ.get('STREAM_INGEST_MAX_ITEM_SIZE', 1048576))
+    # Rows fetched per server-side cursor round trip by GET /grants/export
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
     
     
     PREDEFINED_TAGS = TAG_LIST
 
+    # JSON responses: 'orjson' (used when installed) or 'default' (stdlib)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    # Response compression (brotli when installed, else gzip) for bodies above the threshold
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+    # GET /metrics (Prometheus text format) plus request/SQL/tagging instrumentation
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Opt-in SQL profiling (staging): Server-Timing headers and N+1 warnings per request / job
+    SQL_PROFILING = os.environ.get('SQL_PROFILING', 'false').lower() == 'true'
+    SQL_PROFILING_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_PROFILING_N_PLUS_ONE_THRESHOLD', 10))
+
 class DevelopmentConfig(Config):
     """Configuración de desarrollo."""
     DEBUG = True
@@ -3,7 +3,10 @@ from flask_marshmallow import Marshmallow
 from flask_cors import CORS
 from flask_migrate import Migrate
 
-db = SQLAlchemy()
+from app.utils.replica import RoutingSession
+
+# Reads of @use_replica views may go to the read replica bind
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 ma = Marshmallow()
 cors = CORS()
 migrate = Migrate()
\ No newline at end of file
@@ -0,0 +1,209 @@
+import os
+import time
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.utils.metrics import registry
+from app.utils.sql_timing import add_statement_listener
+
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+TAGGING_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# --- API ---
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests by route.", ("method", "route", "status")
+)
+
+# --- SQL (engine events) ---
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "Duration of SQL statements by operation.", ("operation",), SQL_BUCKETS
+)
+DB_QUERY_ERRORS = registry.counter("db_query_errors", "SQL statements that raised an error.")
+DB_POOL_CHECKOUT = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time a session waited for a pooled connection at the start of a transaction, by bind (default, replica).",
+    ("bind",),
+    SQL_BUCKETS + (5.0, 10.0, 30.0),
+)
+
+# --- Tagging ---
+TAGGING_DURATION = registry.histogram(
+    "tagging_duration_seconds",
+    "Time spent tagging a set of grants, by method (simple, llm, fallback).",
+    ("method",),
+    TAGGING_BUCKETS,
+)
+TAGGED_GRANTS = registry.counter(
+    "tagged_grants", "Grants tagged, by method (simple, llm, fallback, cache).", ("method",)
+)
+TAGGING_FALLBACKS = registry.counter(
+    "tagging_fallbacks",
+    "Grants tagged with the simple tagger because the configured one could not be used, by reason "
+    "(missing_config, backend_error, grant_error).",
+    ("reason",),
+)
+LLM_REQUEST_DURATION = registry.histogram(
+    "llm_request_duration_seconds", "Latency of LLM chat completions (each attempt).", ("outcome",), TAGGING_BUCKETS
+)
+LLM_TOKENS = registry.counter("llm_tokens", "LLM tokens used, as reported by the API.", ("type",))
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+def _collect_queue_depth():
+    queue = current_app.extensions.get('tagging_queue')
+    return {(): queue.depth() if queue is not None else 0}
+
+
+def _collect_tagging_backlog():
+    from app.api.models import TaggingJob
+    from app.extensions import db
+
+    # Shared by every process: counted from the jobs table
+    backlog = db.session.scalar(
+        select(func.coalesce(func.sum(TaggingJob.total - TaggingJob.processed - TaggingJob.failed), 0))
+        .where(TaggingJob.status.in_(("receiving", "pending", "running")))
+    )
+    db.session.rollback()
+    return {(): backlog}
+
+
+def _bind_name(bind_key):
+    return bind_key or "default"
+
+
+def _collect_pool():
+    from app.extensions import db
+
+    connections = {}
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        bind = _bind_name(bind_key)
+        connections[(bind, "checked_out")] = pool.checkedout()
+        connections[(bind, "idle")] = pool.checkedin()
+        connections[(bind, "overflow")] = max(pool.overflow(), 0)
+    return connections
+
+
+def _collect_cache_lookups():
+    lookups = {}
+    for name in ("tag_cache", "query_cache"):
+        cache = current_app.extensions.get(name)
+        if cache is not None:
+            lookups[(name, "hit")] = cache.hits
+            lookups[(name, "miss")] = cache.misses
+    return lookups
+
+
+PROCESS_START_TIME = time.time()
+
+
+def _reset_process_start_time():
+    global PROCESS_START_TIME
+    PROCESS_START_TIME = time.time()
+
+
+# Workers forked from a preloaded app (gunicorn --preload) are new processes
+os.register_at_fork(after_in_child=_reset_process_start_time)
+
+# Labelled by PID: tells the workers apart, even those forked in the same second
+registry.gauge(
+    "process_start_time_seconds",
+    "Start time of the process (Unix time).",
+    ("pid",),
+    collect=lambda: {(str(os.getpid()),): PROCESS_START_TIME},
+)
+registry.gauge("tagging_queue_depth", "Tagging jobs waiting in this process' queue.", collect=_collect_queue_depth)
+registry.gauge(
+    "tagging_backlog_grants", "Grants of unfinished tagging jobs, across processes.", collect=_collect_tagging_backlog
+)
+registry.gauge(
+    "db_pool_connections", "Connections of the SQLAlchemy pools, by bind (default, replica).", ("bind", "state"),
+    collect=_collect_pool,
+)
+registry.counter("cache_lookups", "Cache lookups by cache and result.", ("cache", "result"), collect=_collect_cache_lookups)
+
+
+# --- SQL statements (timed once for every engine, see app.utils.sql_timing) ---
+
+def _observe_statement(statement, duration):
+    operation = statement.lstrip()[:10].split(None, 1)[0].upper() if statement.strip() else ""
+    DB_QUERY_DURATION.observe(duration, operation=operation if operation in SQL_OPERATIONS else "OTHER")
+
+
+def _count_statement_error(context):
+    DB_QUERY_ERRORS.inc()
+
+
+# A session takes its connection from the pool when its first statement runs
+# (do_orm_execute fires before, after_begin once the connection is held)
+
+def _before_session_execute(orm_execute_state):
+    orm_execute_state.session.info["metrics_execute_start"] = time.perf_counter()
+
+
+def _after_session_begin(session, transaction, connection):
+    start = session.info.pop("metrics_execute_start", None)
+    if start is not None:
+        DB_POOL_CHECKOUT.observe(time.perf_counter() - start, bind=_engine_bind(connection.engine))
+
+
+def _engine_bind(engine):
+    """Bind name (default, replica) of an engine of the current app."""
+    if has_app_context():
+        from app.extensions import db
+
+        for bind_key, bind_engine in db.engines.items():
+            if bind_engine is engine:
+                return _bind_name(bind_key)
+    return "default"
+
+
+def _after_transaction_end(session, transaction):
+    session.info.pop("metrics_execute_start", None)
+
+
+def _listen_engine_events():
+    add_statement_listener(_observe_statement, _count_statement_error)
+    if not event.contains(Session, "do_orm_execute", _before_session_execute):
+        event.listen(Session, "do_orm_execute", _before_session_execute)
+        event.listen(Session, "after_begin", _after_session_begin)
+        event.listen(Session, "after_transaction_end", _after_transaction_end)
+
+
+def init_metrics(app):
+    """
+    Instruments requests and SQL statements and serves GET /metrics in the
+    Prometheus text format. Metrics are per process: with several workers,
+    scrape each one (or aggregate) like any multi-process exporter.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    _listen_engine_events()
+
+    # Registered first, so its after_request runs last (compression included)
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_duration(response):
+        start = g.pop("metrics_request_start", None)
+        if start is not None:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=request.url_rule.rule if request.url_rule is not None else "<unmatched>",
+                status=response.status_code,
+            )
+        return response
+
+    def metrics():
+        return current_app.response_class(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics, methods=["GET"])
@@ -0,0 +1,163 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+
+from app.utils.sql_timing import add_statement_listener
+
+# Profile of the current request or background job (None when not profiling)
+_current_profile = ContextVar("sql_profile", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """
+    Shape of a SQL statement: literals and bound parameters become '?' and
+    lists of them '(...)', so the same query run for different values (or
+    IN lists of different lengths) has the same fingerprint.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _VALUE_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryProfile:
+    """SQL statements run while profiling one request or job."""
+
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.started_at = time.perf_counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """Fingerprints run at least `threshold` times (likely N+1 patterns), most frequent first."""
+        return [(shape, count) for shape, count in self.fingerprints.most_common() if count >= threshold]
+
+    def summary(self, threshold):
+        elapsed = time.perf_counter() - self.started_at
+        line = (
+            f"{self.label}: {self.count} queries, {self.duration * 1000:.1f} ms in DB "
+            f"of {elapsed * 1000:.1f} ms, {len(self.fingerprints)} distinct"
+        )
+        for shape, count in self.repeated(threshold):
+            line += f"\n  N+1? {count}x {shape[:200]}"
+        return line
+
+
+@contextmanager
+def profile_queries(label):
+    """Records the SQL statements run in this context (thread / task) into a QueryProfile."""
+    profile = QueryProfile(label)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_job(app, label):
+    """
+    Profiles a background job when SQL_PROFILING is on and logs one summary
+    line when it ends (a warning if a statement repeats N+1-style).
+    """
+    if not app.config['SQL_PROFILING']:
+        yield None
+        return
+
+    threshold = app.config['SQL_PROFILING_N_PLUS_ONE_THRESHOLD']
+    with profile_queries(label) as profile:
+        try:
+            yield profile
+        finally:
+            log = app.logger.warning if profile.repeated(threshold) else app.logger.info
+            log(f"[SQL-PROFILE] {profile.summary(threshold)}")
+
+
+# --- SQL statements (timed once for every engine, see app.utils.sql_timing) ---
+
+def _record_statement(statement, duration):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, duration)
+
+
+def _log_request_profile(logger, profile, threshold):
+    log = logger.warning if profile.repeated(threshold) else logger.debug
+    log(f"[SQL-PROFILE] {profile.summary(threshold)}")
+
+
+def _profiled_stream(body, profile, logger, threshold):
+    # Streamed bodies run their queries after the request has been torn down
+    token = _current_profile.set(profile)
+    try:
+        yield from body
+    finally:
+        _current_profile.reset(token)
+        _log_request_profile(logger, profile, threshold)
+
+
+def init_profiling(app):
+    """
+    Opt-in SQL profiling (SQL_PROFILING=true, meant for development and
+    staging): each request reports its statement count and DB time in a
+    Server-Timing header, and requests where one statement shape runs
+    SQL_PROFILING_N_PLUS_ONE_THRESHOLD times or more are logged as likely
+    N+1 query patterns. Background jobs use `profile_job`.
+    """
+    if not app.config['SQL_PROFILING']:
+        return
+
+    add_statement_listener(_record_statement)
+    threshold = app.config['SQL_PROFILING_N_PLUS_ONE_THRESHOLD']
+
+    @app.before_request
+    def _start_sql_profile():
+        profile = QueryProfile(f"{request.method} {request.path}")
+        g.sql_profile = profile
+        g.sql_profile_token = _current_profile.set(profile)
+
+    @app.after_request
+    def _add_server_timing(response):
+        profile = g.get("sql_profile")
+        if profile is None:
+            return response
+
+        # Headers go out before a streamed body: they only cover the view
+        elapsed = time.perf_counter() - profile.started_at
+        response.headers.add(
+            "Server-Timing", f'db;dur={profile.duration * 1000:.1f};desc="{profile.count} queries"'
+        )
+        response.headers.add("Server-Timing", f"app;dur={elapsed * 1000:.1f}")
+
+        if response.is_streamed:
+            response.response = _profiled_stream(response.response, profile, current_app.logger, threshold)
+            g.sql_profile_streamed = True
+        return response
+
+    @app.teardown_request
+    def _stop_sql_profile(exc):
+        profile = g.pop("sql_profile", None)
+        token = g.pop("sql_profile_token", None)
+        if token is not None:
+            _current_profile.reset(token)
+
+        if profile is not None and not g.pop("sql_profile_streamed", False):
+            _log_request_profile(current_app.logger, profile, threshold)
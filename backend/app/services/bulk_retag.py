@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.api.models import Grant, Tag, grant_tags
+from app.extensions import db
+from app.services.tagging_pipeline import save_grant_tags
+from app.services.simple_tagger import tagging_text
+from app.services.tag_matcher import get_tag_matcher
+from app.services.tagging_service import tag_grants
+
+# --- WORKER PROCESSES (no app context, no DB) ---
+
+_worker_matcher = None
+
+
+def _init_worker(predefined_tags):
+    global _worker_matcher
+    _worker_matcher = get_tag_matcher(predefined_tags)
+
+
+def _tag_rows(rows):
+    """Tags (id, name, description) tuples with the simple tagger."""
+    return {
+        grant_id: list(_worker_matcher.find(tagging_text(description, name)))
+        for grant_id, name, description in rows
+    }
+
+
+# --- COORDINATOR (app context) ---
+
+def iter_grant_chunks(query, chunk_size):
+    """
+    Yields lists of (id, name, description) tuples of a filtered Grant query,
+    `chunk_size` at a time, with keyset pagination on the ID.
+    """
+    last_id = 0
+    while True:
+        rows = (
+            query.with_entities(Grant.id, Grant.name, Grant.description)
+            .filter(Grant.id > last_id)
+            .order_by(None)
+            .order_by(Grant.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield [tuple(row) for row in rows]
+
+
+def _count_changes(tags_by_grant):
+    """Number of grants whose stored tags differ from `tags_by_grant`."""
+    current = {grant_id: set() for grant_id in tags_by_grant}
+    rows = db.session.execute(
+        select(grant_tags.c.grant_id, Tag.name)
+        .join(Tag, Tag.id == grant_tags.c.tag_id)
+        .where(grant_tags.c.grant_id.in_(list(tags_by_grant)))
+    )
+    for grant_id, name in rows:
+        current[grant_id].add(name)
+    return sum(1 for grant_id, tags in tags_by_grant.items() if set(tags) != current[grant_id])
+
+
+def run_bulk_retag(query, method="simple", chunk_size=None, workers=None, dry_run=False, log=None):
+    """
+    Re-tags every grant of a filtered Grant query.
+
+    Chunks of grants are read from the DB and fanned out to a pool of
+    `workers` processes running the simple tagger (all cores by default);
+    the results are written back chunk by chunk with `save_grant_tags`
+    (multi-row inserts, tag counts and versions kept up to date) while the
+    next chunks are being tagged. Other methods ('llm') are I/O bound and
+    run in this process through `tag_grants`, which is already concurrent.
+
+    `changed` counts the grants whose stored tags differ from the new ones,
+    with or without `dry_run` (which writes nothing). Returns a report dict.
+    """
+    chunk_size = chunk_size or current_app.config['RETAG_BATCH_SIZE']
+    workers = workers or os.cpu_count()
+    log = log or current_app.logger.info
+    report = {"grants": 0, "changed": 0, "failed": 0, "chunks": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    def write(tags_by_grant, chunk):
+        report["chunks"] += 1
+        report["grants"] += len(chunk)
+        report["failed"] += len(chunk) - len(tags_by_grant)
+        try:
+            changed = _count_changes(tags_by_grant)
+            if not dry_run:
+                save_grant_tags(tags_by_grant)
+                db.session.commit()
+            report["changed"] += changed
+        except Exception as e:
+            db.session.rollback()
+            report["failed"] += len(tags_by_grant)
+            current_app.logger.error(f"Could not save a chunk of {len(chunk)} grants: {e}", exc_info=True)
+
+        elapsed = time.perf_counter() - start
+        log(f"{report['grants']} grants re-tagged ({report['grants'] / elapsed:.0f} grants/s).")
+
+    if method == "simple":
+        # 'spawn': workers never inherit the DB connections of this process
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(list(current_app.config['PREDEFINED_TAGS']),),
+        )
+        with executor:
+            in_flight = deque()
+            for chunk in iter_grant_chunks(query, chunk_size):
+                in_flight.append((executor.submit(_tag_rows, chunk), chunk))
+                # Bounded read-ahead: keep every worker busy without loading the whole corpus
+                while len(in_flight) >= workers * 2:
+                    future, done_chunk = in_flight.popleft()
+                    write(future.result(), done_chunk)
+            while in_flight:
+                future, done_chunk = in_flight.popleft()
+                write(future.result(), done_chunk)
+    else:
+        for chunk in iter_grant_chunks(query, chunk_size):
+            grants = [
+                SimpleNamespace(id=grant_id, name=name, description=description)
+                for grant_id, name, description in chunk
+            ]
+            write(tag_grants(grants, method=method), chunk)
+
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    return report
@@ -0,0 +1,67 @@
+import datetime
+
+from sqlalchemy import select, update
+
+from app.api.models import DataVersion, Grant, utcnow
+from app.extensions import db
+from app.utils.db import dialect_insert
+
+# Counter of the grants collection: grants, their tags and the tag counts
+GRANTS = "grants"
+
+
+def as_utc(value):
+    """SQLite returns naive datetimes; they are stored in UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def bump_data_version(name=GRANTS):
+    """
+    Increments a global change counter (creating it if needed).
+    Does not commit: the bump becomes visible with the change itself.
+    """
+    stmt = dialect_insert(DataVersion.__table__).values(name=name, version=1, updated_at=utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"version": DataVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.session.execute(stmt)
+
+
+def bump_grant_versions(grant_ids):
+    """
+    Increments the version of some grants (a list of IDs or a SELECT of IDs)
+    and the global counter. Does not commit.
+    """
+    if isinstance(grant_ids, (list, tuple, set)) and not grant_ids:
+        return
+
+    db.session.execute(
+        update(Grant)
+        .where(Grant.id.in_(grant_ids))
+        .values(version=Grant.version + 1, updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    bump_data_version()
+
+
+def get_data_version(name=GRANTS):
+    """Returns the (version, updated_at) of a global counter; (0, None) if it was never bumped."""
+    row = db.session.execute(
+        select(DataVersion.version, DataVersion.updated_at).where(DataVersion.name == name)
+    ).first()
+    if row is None:
+        return 0, None
+    return row.version, as_utc(row.updated_at)
+
+
+def get_grant_version(grant_id):
+    """Returns the (version, updated_at) of a grant, or None if it does not exist."""
+    row = db.session.execute(
+        select(Grant.version, Grant.updated_at).where(Grant.id == grant_id)
+    ).first()
+    if row is None:
+        return None
+    return row.version, as_utc(row.updated_at)
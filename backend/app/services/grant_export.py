@@ -0,0 +1,73 @@
+import csv
+import io
+
+from flask import current_app
+
+from app.api.models import Grant
+from app.extensions import db
+from app.services.grant_reader import grant_row_to_dict, with_grant_columns
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_COLUMNS = ("id", "name", "description", "tags")
+# Separator of the tag names inside the CSV 'tags' column
+CSV_TAG_SEPARATOR = "|"
+
+
+def iter_grant_batches(query, order_by=(), batch_size=None):
+    """
+    Yields lists of grant dicts (same shape as GET /grants) for every grant
+    of a filtered Grant query, `batch_size` rows at a time.
+
+    Rows come from a server-side cursor (yield_per implies stream_results on
+    PostgreSQL), so only one batch is in memory whatever the number of grants.
+    """
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    stmt = with_grant_columns(query.order_by(*order_by, Grant.id.asc())).statement
+
+    result = db.session.execute(stmt, execution_options={"yield_per": batch_size})
+    try:
+        for rows in result.partitions():
+            yield [grant_row_to_dict(row) for row in rows]
+    finally:
+        result.close()
+
+
+def iter_ndjson_export(batches):
+    """Serializes batches of grants as NDJSON, one chunk of text per batch."""
+    dumps = current_app.json.dumps
+    for grants in batches:
+        yield "".join(dumps(grant) + "\n" for grant in grants)
+
+
+def iter_csv_export(batches):
+    """Serializes batches of grants as CSV (header first), one chunk of text per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+
+    for grants in batches:
+        writer.writerows(
+            (grant["id"], grant["name"], grant["description"], CSV_TAG_SEPARATOR.join(grant["tags"]))
+            for grant in grants
+        )
+        yield flush()
+
+
+def iter_export(query, export_format, order_by=()):
+    """Returns the chunks of text of the export of a filtered Grant query."""
+    batches = iter_grant_batches(query, order_by)
+    if export_format == "csv":
+        return iter_csv_export(batches)
+    return iter_ndjson_export(batches)
@@ -0,0 +1,78 @@
+from sqlalchemy import exists, false, func, select
+
+from app.api.models import Grant, Tag, TagCount, grant_tags
+from app.extensions import db
+from app.services.grant_search import apply_fulltext_search
+
+
+def resolve_tag_ids(tag_names):
+    """
+    Maps tag names to IDs, ordered from the rarest tag to the most common.
+    Returns None if any of the names does not exist.
+    """
+    tag_names = set(tag_names)
+    tag_ids = db.session.scalars(select(Tag.id).where(Tag.name.in_(tag_names))).all()
+    if len(tag_ids) != len(tag_names):
+        return None
+    if len(tag_ids) == 1:
+        return tag_ids
+
+    # Counts maintained by the tagging pipeline (tag_counts); only tags without
+    # a summary row are counted on grant_tags(tag_id, grant_id), index-only
+    frequencies = dict(db.session.execute(
+        select(TagCount.tag_id, TagCount.grant_count).where(TagCount.tag_id.in_(tag_ids))
+    ).all())
+    uncounted = [tag_id for tag_id in tag_ids if tag_id not in frequencies]
+    if uncounted:
+        frequencies.update(db.session.execute(
+            select(grant_tags.c.tag_id, func.count())
+            .where(grant_tags.c.tag_id.in_(uncounted))
+            .group_by(grant_tags.c.tag_id)
+        ).all())
+    return sorted(tag_ids, key=lambda tag_id: frequencies.get(tag_id, 0))
+
+
+def apply_tag_filter(query, tag_names):
+    """
+    Keeps the grants that have ALL the given tags.
+
+    Tag IDs are resolved first; the candidate set comes from the rarest tag
+    (IN over grant_tags(tag_id, grant_id)), and every other tag is checked
+    with an EXISTS probe on the (grant_id, tag_id) primary key. The planner
+    never has to GROUP BY the full grants x tags join.
+    """
+    tag_ids = resolve_tag_ids(tag_names)
+    if not tag_ids:
+        # An unknown tag can never be matched
+        return query.filter(false())
+
+    rarest, others = tag_ids[0], tag_ids[1:]
+    query = query.filter(
+        Grant.id.in_(select(grant_tags.c.grant_id).where(grant_tags.c.tag_id == rarest))
+    )
+    for tag_id in others:
+        query = query.filter(
+            exists().where(grant_tags.c.grant_id == Grant.id, grant_tags.c.tag_id == tag_id)
+        )
+    return query
+
+
+def apply_grant_filters(query, name_filter=None, tag_filters=None, search_text=None):
+    """
+    Applies the filters shared by the grant listing endpoints.
+    Returns a (query, rank_order) tuple; `rank_order` is non-empty only for
+    full-text searches and should lead the ORDER BY.
+    """
+    rank_order = []
+
+    if name_filter:
+        query = query.filter(Grant.name.ilike(f'%{name_filter}%'))
+
+    if tag_filters:
+        # Find grants that have ALL specified tags
+        query = apply_tag_filter(query, tag_filters)
+
+    if search_text:
+        query, rank_order = apply_fulltext_search(query, search_text)
+
+    return query, rank_order
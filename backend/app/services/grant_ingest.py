@@ -0,0 +1,214 @@
+import csv
+import io
+
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import select, text
+
+from app.api.models import Grant
+from app.api.schemas import grant_input_schema
+from app.extensions import db
+from app.services.data_version import bump_data_version
+from app.services.tagging_queue import tagging_queue
+from app.utils.db import chunked, dialect_insert, dialect_name
+from app.utils.json_stream import RecordError
+
+STAGING_TABLE = "grant_ingest_staging"
+
+
+def insert_new_grants(grants_data):
+    """
+    Inserts the grants whose names do not exist yet.
+
+    Duplicates inside the payload are dropped (first occurrence wins),
+    existing names are found with one IN (...) query per chunk, and the
+    rest is written with INSERT ... ON CONFLICT (name) DO NOTHING RETURNING,
+    so a concurrent upload of the same names is skipped instead of failing.
+    Bumps the grants data version. Does not commit.
+
+    Returns a (created, skipped) tuple: `created` is a list of dicts with
+    the new grants (id, name, description), `skipped` a list of names.
+    """
+    chunk_size = current_app.config['BULK_INSERT_CHUNK_SIZE']
+
+    # --- 1. Drop duplicates inside the payload ---
+    unique = {}
+    skipped = []
+    for grant_data in grants_data:
+        if grant_data['name'] in unique:
+            skipped.append(grant_data['name'])
+            continue
+        unique[grant_data['name']] = grant_data['description']
+
+    # --- 2. Drop names that already exist ---
+    existing = set()
+    for names in chunked(unique, chunk_size):
+        existing.update(db.session.scalars(select(Grant.name).where(Grant.name.in_(names))))
+
+    skipped.extend(name for name in unique if name in existing)
+    to_insert = [
+        {"name": name, "description": description}
+        for name, description in unique.items()
+        if name not in existing
+    ]
+
+    # --- 3. Multi-row insert; rows lost to a concurrent upload are skipped ---
+    created = []
+    for rows in chunked(to_insert, chunk_size):
+        stmt = (
+            dialect_insert(Grant.__table__)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Grant.id, Grant.name)
+        )
+        ids_by_name = dict((name, grant_id) for grant_id, name in db.session.execute(stmt))
+
+        for row in rows:
+            if row["name"] in ids_by_name:
+                created.append({"id": ids_by_name[row["name"]], **row})
+            else:
+                skipped.append(row["name"])
+
+    if created:
+        bump_data_version()
+    return created, skipped
+
+
+def copy_new_grants(grants_data):
+    """
+    PostgreSQL (psycopg2) version of `insert_new_grants` for large chunks.
+
+    The rows are streamed with COPY into a temporary staging table (dropped
+    at commit) and merged into `grants` with a single INSERT ... SELECT:
+    DISTINCT ON keeps the first occurrence of each name and
+    ON CONFLICT (name) DO NOTHING skips the existing ones.
+    Does not commit.
+
+    Returns a (created_ids, skipped_count) tuple.
+    """
+    connection = db.session.connection()
+    connection.exec_driver_sql(
+        f"CREATE TEMP TABLE {STAGING_TABLE} (seq integer, name text, description text) ON COMMIT DROP"
+    )
+
+    # Quoted CSV: empty strings stay empty strings instead of NULLs
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows((seq, row["name"], row["description"]) for seq, row in enumerate(grants_data))
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} (seq, name, description) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+    created_ids = connection.execute(text(
+        f"INSERT INTO grants (name, description) "
+        f"SELECT DISTINCT ON (name) name, description FROM {STAGING_TABLE} ORDER BY name, seq "
+        f"ON CONFLICT (name) DO NOTHING RETURNING id"
+    )).scalars().all()
+
+    if created_ids:
+        bump_data_version()
+    return created_ids, len(grants_data) - len(created_ids)
+
+
+def load_grant_chunk(grants_data):
+    """
+    Inserts a chunk of validated grants, skipping existing names.
+    COPY + merge on PostgreSQL, multi-row inserts elsewhere. Does not commit.
+
+    Returns a (created_ids, skipped_count) tuple.
+    """
+    if dialect_name() == "postgresql" and db.engine.driver == "psycopg2":
+        return copy_new_grants(grants_data)
+
+    created, skipped = insert_new_grants(grants_data)
+    return [grant["id"] for grant in created], len(skipped)
+
+
+def ingest_grant_stream(records):
+    """
+    Validates and loads an iterable of grant records (e.g. parsed from an
+    NDJSON upload), STREAM_INGEST_CHUNK_SIZE records at a time: only one
+    chunk is held in memory, whatever the size of the upload.
+
+    Each chunk is committed with its tagging job items, so a failure keeps
+    the chunks already loaded. The tagging job stays 'receiving' until the
+    end of the stream and is then released to the workers (not submitted).
+
+    Invalid records (RecordError items or schema errors) are skipped and
+    reported by their 0-based position in the stream; only the first
+    STREAM_INGEST_MAX_ERRORS are kept. A fatal RecordError ends the stream.
+
+    Returns a report dict.
+    """
+    chunk_size = current_app.config['STREAM_INGEST_CHUNK_SIZE']
+    max_errors = current_app.config['STREAM_INGEST_MAX_ERRORS']
+
+    report = {
+        "received": 0,
+        "created": 0,
+        "skipped": 0,
+        "invalid": 0,
+        "truncated": False,
+        "errors": [],
+        "jobId": None,
+    }
+    chunk = []
+
+    def report_error(index, messages):
+        report["invalid"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"index": index, "errors": messages})
+
+    def flush():
+        created_ids, skipped = load_grant_chunk(chunk)
+        report["created"] += len(created_ids)
+        report["skipped"] += skipped
+
+        if created_ids and report["jobId"] is None:
+            report["jobId"] = tagging_queue.create_job(created_ids, status="receiving").id
+        elif created_ids:
+            tagging_queue.add_job_items(report["jobId"], created_ids)
+        db.session.commit()
+
+        current_app.logger.debug(
+            f"Stream ingest: loaded {len(chunk)} records ({len(created_ids)} new, {skipped} duplicates)."
+        )
+        chunk.clear()
+
+    try:
+        for index, record in enumerate(records):
+            report["received"] += 1
+
+            if isinstance(record, RecordError):
+                report_error(index, {"_schema": [str(record)]})
+                if record.fatal:
+                    report["truncated"] = True
+                    break
+                continue
+
+            try:
+                chunk.append(grant_input_schema.load(record))
+            except ValidationError as e:
+                report_error(index, e.messages)
+                continue
+
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # Grants committed so far are tagged, even if the upload failed halfway
+        if report["jobId"] is not None:
+            tagging_queue.release_job(report["jobId"])
+
+    return report
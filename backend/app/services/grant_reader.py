@@ -0,0 +1,66 @@
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.api.models import Grant, Tag, grant_tags
+from app.utils.db import dialect_name
+
+
+def tag_names_column():
+    """
+    Correlated subquery returning the tag names of each grant, ordered by
+    tag ID (same order as the Grant.tags relationship).
+    - PostgreSQL: array_agg(...) -> a Python list (None when there are no tags)
+    - SQLite / others: json_group_array(...) -> a JSON string
+    """
+    if dialect_name() == "postgresql":
+        return (
+            select(func.array_agg(aggregate_order_by(Tag.name, Tag.id)))
+            .select_from(grant_tags.join(Tag, Tag.id == grant_tags.c.tag_id))
+            .where(grant_tags.c.grant_id == Grant.id)
+            .scalar_subquery()
+            .label("tag_names")
+        )
+
+    ordered = (
+        select(Tag.name)
+        .select_from(grant_tags.join(Tag, Tag.id == grant_tags.c.tag_id))
+        .where(grant_tags.c.grant_id == Grant.id)
+        .order_by(Tag.id)
+        # Derived tables are not auto-correlated; point it at the outer grants row
+        .correlate(Grant)
+        .subquery()
+    )
+    return (
+        select(func.json_group_array(ordered.c.name))
+        .scalar_subquery()
+        .label("tag_names")
+    )
+
+
+def with_grant_columns(query):
+    """
+    Turns a Grant query into a plain-row query: id, name, description and
+    the aggregated tag names, fetched in a single statement.
+    """
+    return query.with_entities(Grant.id, Grant.name, Grant.description, tag_names_column())
+
+
+def grant_row_to_dict(row):
+    """
+    Builds the output of GrantOutputSchema from a row of `with_grant_columns`,
+    without ORM objects or Marshmallow.
+    """
+    tag_names = row.tag_names
+    if tag_names is None:
+        tag_names = []
+    elif isinstance(tag_names, str):
+        tag_names = json.loads(tag_names)
+
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "tags": tag_names,
+    }
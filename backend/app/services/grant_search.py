@@ -0,0 +1,105 @@
+import threading
+import weakref
+
+from sqlalchemy import bindparam, func, literal_column, or_, select, text
+
+from app.api.models import Grant
+from app.extensions import db
+from app.utils.db import dialect_name
+
+# Text search configuration used by the grants.search_vector column
+TS_CONFIG = "english"
+
+# SQLite engines known to have the FTS5 index (one per database: primary, replica, tests...)
+_sqlite_fts_engines = weakref.WeakSet()
+_sqlite_fts_lock = threading.Lock()
+
+
+# Kept in sync with the 'add grant search indexes' migration
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS grants_fts USING fts5("
+    "name, description, content='grants', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS grants_fts_ai AFTER INSERT ON grants BEGIN "
+    "INSERT INTO grants_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS grants_fts_ad AFTER DELETE ON grants BEGIN "
+    "INSERT INTO grants_fts(grants_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS grants_fts_au AFTER UPDATE ON grants BEGIN "
+    "INSERT INTO grants_fts(grants_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO grants_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+# Table and triggers created by SQLITE_FTS_DDL
+SQLITE_FTS_OBJECTS = ("grants_fts", "grants_fts_ai", "grants_fts_ad", "grants_fts_au")
+
+
+def ensure_sqlite_fts(engine):
+    """
+    Creates the FTS5 index of grants in the SQLite database of `engine` if
+    it or one of its triggers is missing (databases created with
+    db.create_all() instead of migrations, or whose grants table was
+    recreated), rebuilding the index. Runs on its own connection, outside
+    the session.
+    """
+    if engine in _sqlite_fts_engines:
+        return
+
+    with _sqlite_fts_lock:
+        if engine in _sqlite_fts_engines:
+            return
+        with engine.begin() as connection:
+            existing = connection.execute(
+                text("SELECT name FROM sqlite_master WHERE name IN :names").bindparams(
+                    bindparam("names", expanding=True)
+                ),
+                {"names": list(SQLITE_FTS_OBJECTS)},
+            ).scalars().all()
+            if len(existing) < len(SQLITE_FTS_OBJECTS):
+                for statement in SQLITE_FTS_DDL:
+                    connection.execute(text(statement))
+                connection.execute(text("INSERT INTO grants_fts(grants_fts) VALUES ('rebuild')"))
+        _sqlite_fts_engines.add(engine)
+
+
+def _fts5_query(q):
+    """Turns free text into an FTS5 query: every word must match (quoted, so no syntax errors)."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in q.split())
+
+
+def apply_fulltext_search(query, q):
+    """
+    Restricts a Grant query to grants matching the full-text query `q`
+    (over name + description).
+    Returns a (query, order_by) tuple; `order_by` ranks the best matches first.
+
+    - PostgreSQL: indexed `search_vector` column with websearch_to_tsquery / ts_rank
+    - SQLite: FTS5 virtual table with bm25 ranking
+    - Others: unranked ILIKE fallback
+    """
+    dialect = dialect_name()
+
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(TS_CONFIG, q)
+        vector = literal_column("grants.search_vector")
+        rank = func.ts_rank(vector, ts_query)
+        return query.filter(vector.op("@@")(ts_query)), [rank.desc()]
+
+    if dialect == "sqlite":
+        # On the database that will serve the read: the replica inside @use_replica views
+        ensure_sqlite_fts(db.session.get_bind(clause=query.statement))
+        matches = (
+            select(
+                literal_column("rowid").label("grant_id"),
+                # FTS5's hidden 'rank' column is bm25(); unlike a bm25() call it
+                # can still be used once SQLite flattens this subquery into a join
+                literal_column("rank").label("rank"),
+            )
+            .select_from(text("grants_fts"))
+            .where(text("grants_fts MATCH :fts_query").bindparams(fts_query=_fts5_query(q)))
+            .subquery("fts")
+        )
+        # bm25() is lower for better matches
+        return query.join(matches, matches.c.grant_id == Grant.id), [matches.c.rank.asc()]
+
+    pattern = f"%{q}%"
+    return query.filter(or_(Grant.name.ilike(pattern), Grant.description.ilike(pattern))), []
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+from flask import current_app
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError,
+)
+
+from app.metrics import LLM_REQUEST_DURATION, LLM_TOKENS
+
+# Errors worth retrying: 429, 5xx, timeouts and dropped connections
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+
+# --- PROMPTS ---
+
+def build_system_prompt(predefined_tags):
+    predefined_tags_str = ", ".join(predefined_tags)
+
+    return f"""
+        You are an expert grant categorization system. Your task is to analyze a grant
+        and assign relevant tags from a predefined list.
+
+        RULES:
+        1. You MUST only use tags from this exact list:
+           {predefined_tags_str}
+        2. You MUST return a valid JSON object in the format: {{"tags": ["tag1", "tag2", ...]}}
+        3. Do not include any tags that are not in the list.
+        4. Do not include any explanation or other text.
+        5. If no tags from the list are relevant, return an empty list: {{"tags": []}}
+        """
+
+
+def build_user_prompt(description, name):
+    return f"""
+        Please categorize the following grant:
+        Grant Name: {name}
+        Description: {description}
+        """
+
+
+def parse_tags_response(response_content, predefined_tags):
+    """
+    Parses the JSON returned by the LLM and keeps only predefined tags.
+    Raises ValueError (or json.JSONDecodeError) if the response is malformed.
+    """
+    if not response_content:
+        raise ValueError("OpenAI returned an empty response.")
+
+    data = json.loads(response_content)
+
+    if "tags" not in data or not isinstance(data["tags"], list):
+        raise ValueError(f"LLM returned invalid JSON structure: {data}")
+
+    # Final validation: Ensure all tags are from the predefined list
+    valid_tags = set(predefined_tags)
+    return [tag for tag in data["tags"] if tag in valid_tags]
+
+
+def build_batch_system_prompt(predefined_tags):
+    predefined_tags_str = ", ".join(predefined_tags)
+
+    return f"""
+        You are an expert grant categorization system. Your task is to analyze several grants
+        and assign relevant tags to each one from a predefined list.
+
+        RULES:
+        1. You MUST only use tags from this exact list:
+           {predefined_tags_str}
+        2. You MUST return a valid JSON object mapping every grant "id" (as a string) to its tags,
+           in the format: {{"<id>": ["tag1", "tag2", ...], ...}}
+        3. Include every grant id you received, exactly once.
+        4. Do not include any tags that are not in the list.
+        5. Do not include any explanation or other text.
+        6. If no tags from the list are relevant for a grant, map it to an empty list.
+        """
+
+
+def build_batch_user_prompt(grants):
+    grants_json = json.dumps(
+        [{"id": grant.id, "name": grant.name, "description": grant.description} for grant in grants],
+        ensure_ascii=False,
+    )
+
+    return f"""
+        Please categorize the following grants:
+        {grants_json}
+        """
+
+
+def parse_batch_response(response_content, grant_ids, predefined_tags):
+    """
+    Parses a batched response ({"<id>": [tags], ...}).
+    Returns a (results, malformed) tuple: `results` maps grant IDs to their
+    validated tags, `malformed` lists the IDs that are missing or invalid.
+    """
+    try:
+        data = json.loads(response_content or "")
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return {}, list(grant_ids)
+
+    valid_tags = set(predefined_tags)
+    results, malformed = {}, []
+    for grant_id in grant_ids:
+        tags = data.get(str(grant_id))
+        if isinstance(tags, list):
+            results[grant_id] = [tag for tag in tags if tag in valid_tags]
+        else:
+            malformed.append(grant_id)
+
+    return results, malformed
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) used for rate limiting."""
+    return len(text) // 4 + 1
+
+
+# --- RATE LIMITING ---
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `per_minute` units per minute.
+    Used both for requests per minute (1 unit per call) and tokens per minute.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        # A single request bigger than the bucket would wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+# --- ENGINE ---
+
+class LLMTaggingEngine:
+    """
+    Tags many grants concurrently through AsyncOpenAI.
+
+    The engine owns an event loop running in a background thread, so a single
+    client (and its HTTP/2 connection pool) is shared by every tagging worker.
+    Calls are limited by a semaphore (LLM_CONCURRENCY) and by token buckets
+    for requests and tokens per minute, and retried with jittered exponential
+    backoff on 429/5xx/connection errors.
+
+    With LLM_BATCH_MODE several grants share one prompt (and one copy of the
+    tag list), up to LLM_BATCH_TOKEN_BUDGET estimated tokens per request.
+    """
+
+    def __init__(self, config):
+        self.model = config['OPENAI_MODEL']
+        self.max_retries = config['LLM_MAX_RETRIES']
+        self.backoff_base = config['LLM_BACKOFF_BASE']
+        self.backoff_max = config['LLM_BACKOFF_MAX']
+        self.expected_output_tokens = config['LLM_EXPECTED_OUTPUT_TOKENS']
+        self.batch_mode = config['LLM_BATCH_MODE']
+        self.batch_token_budget = config['LLM_BATCH_TOKEN_BUDGET']
+        self.batch_max_grants = config['LLM_BATCH_MAX_GRANTS']
+        # The loop thread does not survive a fork: children build their own engine
+        self.pid = os.getpid()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-tagging-loop", daemon=True)
+        self._thread.start()
+
+        # Everything bound to the event loop is created inside it
+        asyncio.run_coroutine_threadsafe(self._setup(config), self._loop).result()
+
+    async def _setup(self, config):
+        self._client = AsyncOpenAI(
+            api_key=config['OPENAI_API_KEY'],
+            base_url=config['OPENAI_BASE_URL'],
+            timeout=config['LLM_TIMEOUT'],
+            max_retries=0, # Retries are handled here, with the rate limiters
+            http_client=DefaultAsyncHttpxClient(http2=config['LLM_HTTP2']),
+        )
+        self._semaphore = asyncio.Semaphore(config['LLM_CONCURRENCY'])
+        self._request_bucket = TokenBucket(config['LLM_REQUESTS_PER_MINUTE'])
+        self._token_bucket = TokenBucket(config['LLM_TOKENS_PER_MINUTE'])
+
+    def tag_many(self, grants, predefined_tags):
+        """
+        Tags `grants` (objects with id, name and description) concurrently.
+        Returns a dict mapping each grant ID to its list of tags, or to the
+        exception raised for that grant (so callers can fall back per grant).
+        """
+        future = asyncio.run_coroutine_threadsafe(self._tag_many(grants, predefined_tags), self._loop)
+        return future.result()
+
+    async def _tag_many(self, grants, predefined_tags):
+        if self.batch_mode:
+            return await self._tag_many_batched(grants, predefined_tags)
+
+        system_prompt = build_system_prompt(predefined_tags)
+        results = await asyncio.gather(
+            *(self._tag_one(grant, system_prompt, predefined_tags) for grant in grants),
+            return_exceptions=True,
+        )
+        return {grant.id: result for grant, result in zip(grants, results)}
+
+    async def _tag_one(self, grant, system_prompt, predefined_tags):
+        user_prompt = build_user_prompt(grant.description, grant.name)
+        content = await self.complete(system_prompt, user_prompt)
+        return parse_tags_response(content, predefined_tags)
+
+    # --- Batched mode: several grants per prompt ---
+
+    async def _tag_many_batched(self, grants, predefined_tags):
+        system_prompt = build_batch_system_prompt(predefined_tags)
+        batches = self._pack_batches(grants, estimate_tokens(system_prompt))
+
+        results = {}
+        for batch_results in await asyncio.gather(
+            *(self._tag_batch(batch, system_prompt, predefined_tags) for batch in batches)
+        ):
+            results.update(batch_results)
+        return results
+
+    def _pack_batches(self, grants, system_tokens):
+        """
+        Greedily packs grants into batches that fit LLM_BATCH_TOKEN_BUDGET
+        (system prompt + grants + expected output) and LLM_BATCH_MAX_GRANTS.
+        A grant that is too big on its own still gets a batch of one.
+        """
+        batches, batch, batch_tokens = [], [], system_tokens
+        for grant in grants:
+            tokens = (
+                estimate_tokens(grant.name) + estimate_tokens(grant.description)
+                + self.expected_output_tokens
+            )
+            if batch and (
+                batch_tokens + tokens > self.batch_token_budget or len(batch) >= self.batch_max_grants
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], system_tokens
+            batch.append(grant)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _tag_batch(self, batch, system_prompt, predefined_tags):
+        """
+        Tags one batch. Grants missing or malformed in the response are split
+        in halves and retried on their own; a single grant that still fails
+        maps to an exception so the caller can fall back for it.
+        """
+        try:
+            content = await self.complete(
+                system_prompt,
+                build_batch_user_prompt(batch),
+                expected_output_tokens=self.expected_output_tokens * len(batch),
+            )
+        except Exception as e:
+            return {grant.id: e for grant in batch}
+
+        results, malformed = parse_batch_response(content, [grant.id for grant in batch], predefined_tags)
+        if not malformed:
+            return results
+
+        retry = [grant for grant in batch if grant.id in set(malformed)]
+        if len(batch) == 1:
+            results[batch[0].id] = ValueError(f"LLM returned an invalid batch response: {content!r}")
+            return results
+
+        middle = (len(retry) + 1) // 2
+        for part in (retry[:middle], retry[middle:]):
+            if part:
+                results.update(await self._tag_batch(part, system_prompt, predefined_tags))
+        return results
+
+    async def complete(self, system_prompt, user_prompt, expected_output_tokens=None):
+        """
+        Sends one chat completion (JSON mode) and returns the message content.
+        """
+        expected_output_tokens = expected_output_tokens or self.expected_output_tokens
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + expected_output_tokens
+
+        for attempt in range(self.max_retries + 1):
+            await self._request_bucket.acquire(1)
+            await self._token_bucket.acquire(tokens)
+
+            start = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    response = await self._client.chat.completions.create(
+                        model=self.model,
+                        response_format={"type": "json_object"},
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=0.1 # Low temperature for more predictable, less "creative" results
+                    )
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    LLM_REQUEST_DURATION.observe(time.perf_counter() - start, outcome="error")
+                    raise
+                LLM_REQUEST_DURATION.observe(time.perf_counter() - start, outcome="retry")
+                # Sleep outside the semaphore so other grants can use the slot
+                await asyncio.sleep(self._backoff(attempt, e))
+                continue
+            except Exception:
+                LLM_REQUEST_DURATION.observe(time.perf_counter() - start, outcome="error")
+                raise
+
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - start, outcome="success")
+            if response.usage is not None:
+                LLM_TOKENS.inc(response.usage.prompt_tokens, type="prompt")
+                LLM_TOKENS.inc(response.usage.completion_tokens, type="completion")
+            return response.choices[0].message.content
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                delay = max(delay, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+
+        return delay
+
+
+_engine_lock = threading.Lock()
+
+
+def get_llm_engine():
+    """
+    Returns the LLM engine of the current app, creating it on first use and
+    again in a forked process (e.g. a worker of `gunicorn --preload`), whose
+    copy of the parent's engine has no event loop thread.
+    """
+    engine = current_app.extensions.get('llm_engine')
+    if engine is None or engine.pid != os.getpid():
+        with _engine_lock:
+            engine = current_app.extensions.get('llm_engine')
+            if engine is None or engine.pid != os.getpid():
+                current_app.logger.info("Initializing async OpenAI engine for this process.")
+                engine = LLMTaggingEngine(current_app.config)
+                current_app.extensions['llm_engine'] = engine
+    return engine
+
+
+# --- TAGGER BACKEND INTERFACE (see tagger_registry) ---
+
+def tag_many(grants, predefined_tags):
+    return get_llm_engine().tag_many(grants, predefined_tags)
+
+
+def warmup(app):
+    """Starts the engine (event loop, HTTP client and connection pool) before the first upload."""
+    with app.app_context():
+        get_llm_engine()
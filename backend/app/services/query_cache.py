@@ -0,0 +1,111 @@
+import datetime
+import hashlib
+import json
+
+from flask import current_app
+from sqlalchemy import delete, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.models import CacheEntry
+from app.extensions import db
+from app.utils.cache import LRUCache, SQLCache
+
+# cache_entries namespace of the 'sql' backend
+NAMESPACE = "grants_query"
+
+
+def grants_query_key(data_version, params):
+    """
+    Key of a GET /grants result: the grants data version plus the normalized
+    query parameters (tags sorted and deduplicated, blank filters dropped).
+    Any write bumps the data version, so stale pages are never looked up again.
+
+    The key starts with the zero-padded data version, so entries of older
+    versions sort before `version_prefix(data_version)` (see
+    `purge_stale_query_results`). 64 characters, like a SHA-256 hex digest.
+    """
+    normalized = {
+        "version": data_version,
+        "tags": sorted(set(params["tags"])),
+        "name": params["name"] or None,
+        "q": " ".join(params["q"].lower().split()) or None,
+        "page": params["page"] if params["cursor"] is None else None,
+        "cursor": params["cursor"],
+        "size": params["size"],
+        "count": params["count"],
+    }
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+    return version_prefix(data_version) + digest[:51]
+
+
+def version_prefix(data_version):
+    return f"{data_version:012d}-"
+
+
+def get_query_cache():
+    """
+    Returns the GET /grants result cache of the current app, or None if disabled.
+    QUERY_CACHE_BACKEND: 'memory' (per-process LRU capped at
+    QUERY_CACHE_MAX_BYTES of JSON), 'sql' (cache_entries table shared by
+    every worker) or 'none'.
+    """
+    if 'query_cache' not in current_app.extensions:
+        backend = current_app.config['QUERY_CACHE_BACKEND']
+        ttl = current_app.config['QUERY_CACHE_TTL'] or None
+
+        if backend == 'memory':
+            # Entries are sized by the JSON body served (see store_query_result)
+            cache = LRUCache(
+                maxsize=current_app.config['QUERY_CACHE_MAXSIZE'],
+                ttl=ttl,
+                maxbytes=current_app.config['QUERY_CACHE_MAX_BYTES'],
+            )
+        elif backend == 'sql':
+            cache = SQLCache(namespace=NAMESPACE, ttl=ttl)
+        elif backend == 'none':
+            cache = None
+        else:
+            raise ValueError(f"Unknown QUERY_CACHE_BACKEND '{backend}'")
+
+        current_app.extensions['query_cache'] = cache
+
+    return current_app.extensions['query_cache']
+
+
+def purge_stale_query_results(data_version):
+    """
+    Deletes the shared ('sql') entries of data versions older than
+    `data_version` and the expired ones, so the table does not fill up with
+    unreachable pages. A primary key range delete, run by readers (once per
+    version and process) rather than in every writer's transaction: bulk
+    tagging bumps the version once per chunk. Newer versions are kept.
+    In-process LRUs simply let their old versions age out. Does not commit.
+    """
+    if current_app.extensions.get('query_cache_purged_version', -1) >= data_version:
+        return
+    current_app.extensions['query_cache_purged_version'] = data_version
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    db.session.execute(
+        delete(CacheEntry).where(
+            CacheEntry.namespace == NAMESPACE,
+            or_(CacheEntry.key < version_prefix(data_version), CacheEntry.expires_at <= now),
+        )
+    )
+
+
+def store_query_result(cache, data_version, key, value, size):
+    """
+    Stores a result; `size` is the length of the JSON body served for it.
+    The 'sql' backend writes in the session, so the write is committed here
+    (read requests have nothing else to commit); a failed write is logged,
+    never raised.
+    """
+    try:
+        if isinstance(cache, SQLCache):
+            purge_stale_query_results(data_version)
+        cache.set(key, value, size)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.warning(f"Could not store a query cache entry: {e}")
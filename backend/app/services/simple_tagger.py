@@ -0,0 +1,46 @@
+from flask import current_app
+
+from app.services.tag_matcher import get_tag_matcher
+
+
+def tagging_text(description, name):
+    """Text searched by the simple tagger: name and description, lowercased."""
+    return description.lower() + " " + name.lower()
+
+
+def simple_string_match_tagger(description, name, predefined_tags=None):
+    """
+    Performs a simple, case-insensitive string match against the
+    grant description and name.
+    With an explicit tag list it needs no app context (e.g. in worker processes).
+    Looking the matcher up hashes the whole tag list: to tag many grants,
+    get the matcher once and call `matcher.find(tagging_text(...))`.
+    """
+    if predefined_tags is None:
+        predefined_tags = current_app.config["PREDEFINED_TAGS"]
+    text_to_search = tagging_text(description, name)
+
+    # The matcher is compiled once per tag list and finds every tag
+    # (including hyphenated ones like 'cost-share') in a single scan
+    matcher = get_tag_matcher(predefined_tags)
+
+    return list(matcher.find(text_to_search))
+
+
+# --- TAGGER BACKEND INTERFACE (see tagger_registry) ---
+
+def tag_many(grants, predefined_tags):
+    """Maps each grant ID to its tags, or to the exception raised for that grant."""
+    matcher = get_tag_matcher(predefined_tags)
+    results = {}
+    for grant in grants:
+        try:
+            results[grant.id] = list(matcher.find(tagging_text(grant.description, grant.name)))
+        except Exception as e:
+            results[grant.id] = e
+    return results
+
+
+def warmup(app):
+    """Compiles the matcher of the configured vocabulary before the first upload."""
+    get_tag_matcher(app.config["PREDEFINED_TAGS"])
@@ -0,0 +1,59 @@
+import hashlib
+import re
+
+from flask import current_app
+
+from app.utils.cache import LRUCache, SQLCache
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def vocabulary_version(tags):
+    """
+    Short, stable fingerprint of a tag list (order-independent).
+    Changes whenever a tag is added, removed or renamed.
+    """
+    joined = "\n".join(sorted(set(tags)))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize(text):
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def tagging_cache_key(name, description, method, model=None, tags_version=None):
+    """
+    Content-addressed key: identical (normalized) name + description tagged
+    with the same method, model and tag list always map to the same key.
+    """
+    parts = [
+        _normalize(name),
+        _normalize(description),
+        tags_version or vocabulary_version(current_app.config['PREDEFINED_TAGS']),
+        method,
+        model or "",
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_tag_cache():
+    """
+    Returns the tagging result cache of the current app, or None if disabled.
+    TAG_CACHE_BACKEND: 'memory' (per-process LRU), 'sql' (shared table) or 'none'.
+    """
+    if 'tag_cache' not in current_app.extensions:
+        backend = current_app.config['TAG_CACHE_BACKEND']
+        ttl = current_app.config['TAG_CACHE_TTL'] or None
+
+        if backend == 'memory':
+            cache = LRUCache(maxsize=current_app.config['TAG_CACHE_MAXSIZE'], ttl=ttl)
+        elif backend == 'sql':
+            cache = SQLCache(namespace="tagging", ttl=ttl)
+        elif backend == 'none':
+            cache = None
+        else:
+            raise ValueError(f"Unknown TAG_CACHE_BACKEND '{backend}'")
+
+        current_app.extensions['tag_cache'] = cache
+
+    return current_app.extensions['tag_cache']
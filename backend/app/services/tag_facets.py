@@ -0,0 +1,81 @@
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from app.api.models import Grant, Tag, TagCount, grant_tags
+from app.extensions import db
+from app.utils.db import dialect_insert
+
+
+def adjust_tag_counts(deltas):
+    """
+    Adds `deltas` (tag ID -> change in number of grants) to the tag_counts
+    summary table with one additive upsert, so concurrent workers never
+    overwrite each other's counts. Does not commit.
+    """
+    rows = [{"tag_id": tag_id, "grant_count": delta} for tag_id, delta in deltas.items() if delta]
+    if not rows:
+        return
+
+    stmt = dialect_insert(TagCount.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tag_id"],
+        set_={"grant_count": TagCount.grant_count + stmt.excluded.grant_count},
+    )
+    db.session.execute(stmt)
+
+
+def tag_count_deltas(old_counts, new_counts):
+    """
+    Returns the tag ID -> delta map of replacing the tags of some grants.
+    Both arguments are iterables of (tag_id, number of grants) pairs.
+    """
+    deltas = Counter(dict(new_counts))
+    deltas.subtract(dict(old_counts))
+    return deltas
+
+
+def rebuild_tag_counts():
+    """Recomputes tag_counts from grant_tags (repairs drift, seeds bulk loads). Does not commit."""
+    db.session.execute(TagCount.__table__.delete())
+    db.session.execute(
+        TagCount.__table__.insert().from_select(
+            ["tag_id", "grant_count"],
+            select(grant_tags.c.tag_id, func.count()).group_by(grant_tags.c.tag_id),
+        )
+    )
+
+
+def global_tag_facets():
+    """
+    Grant count of every tag, most used first, read from the summary table.
+    Tags without grants are included with a count of 0.
+    """
+    count = func.coalesce(TagCount.grant_count, 0)
+    rows = db.session.execute(
+        select(Tag.name, count.label("count"))
+        .outerjoin(TagCount, TagCount.tag_id == Tag.id)
+        .order_by(count.desc(), Tag.name.asc())
+    )
+    return [{"name": name, "count": grant_count} for name, grant_count in rows]
+
+
+def filtered_tag_facets(query):
+    """
+    Grant count of every tag co-occurring in a filtered Grant query (see
+    apply_grant_filters), most used first.
+
+    The filtered grant IDs are only used as an IN (...) probe on the
+    (grant_id, tag_id) primary key of grant_tags, so the aggregation scans
+    the tags of the matching grants, never the whole table.
+    """
+    grant_ids = query.with_entities(Grant.id).order_by(None).subquery()
+    count = func.count().label("count")
+    rows = db.session.execute(
+        select(Tag.name, count)
+        .select_from(grant_tags.join(Tag, Tag.id == grant_tags.c.tag_id))
+        .where(grant_tags.c.grant_id.in_(select(grant_ids.c.id)))
+        .group_by(Tag.id, Tag.name)
+        .order_by(count.desc(), Tag.name.asc())
+    )
+    return [{"name": name, "count": grant_count} for name, grant_count in rows]
@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+
+
+def _is_word_char(char):
+    """Mirrors the definition of a 'word' character used by regex \\b."""
+    return char.isalnum() or char == "_"
+
+
+def _trie_to_regex(node):
+    """
+    Converts a character trie into a regex fragment.
+    Shared prefixes are factored out so the regex engine only walks
+    each branch once, and longer tags are always tried before shorter ones.
+    """
+    is_end = "" in node
+    branches = [
+        re.escape(char) + _trie_to_regex(child)
+        for char, child in sorted(node.items())
+        if char != ""
+    ]
+
+    if not branches:
+        return ""
+
+    if len(branches) == 1:
+        body = branches[0]
+        # A single branch only needs grouping if it is optional
+        return f"(?:{body})?" if is_end else body
+
+    body = "(?:" + "|".join(branches) + ")"
+    # A greedy '?' means the longest tag is preferred; the engine backtracks
+    # to the shorter one if the trailing \b does not hold.
+    return body + "?" if is_end else body
+
+
+class TagMatcher:
+    """
+    Finds every predefined tag in a text with a single regex scan.
+
+    Equivalent to running `\\b<tag>\\b` for each tag, but the pattern is
+    compiled once per tag list instead of once per tag and grant.
+    """
+
+    def __init__(self, tags):
+        # Lowercased tag -> original tag(s), so results keep the configured casing
+        self._originals = {}
+        for tag in tags:
+            if tag:
+                self._originals.setdefault(tag.lower(), []).append(tag)
+
+        # Build a trie of the lowercased tags
+        trie = {}
+        for key in self._originals:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        # The lookahead lets matches overlap (e.g. 'cost-share' and 'share'),
+        # since finditer then only advances one position per match.
+        if self._originals:
+            self._pattern = re.compile(r"\b(?=(" + _trie_to_regex(trie) + r")\b)")
+        else:
+            self._pattern = None
+
+        # For each tag, the shorter tags that also match wherever it matches.
+        # A shorter tag 's' is implied by 't' when 's' is a prefix of 't' and
+        # there is a word boundary right after 's' inside 't'.
+        self._implied = {}
+        for key in self._originals:
+            implied = [key]
+            for length in range(1, len(key)):
+                prefix = key[:length]
+                if prefix in self._originals and (
+                    _is_word_char(key[length - 1]) != _is_word_char(key[length])
+                ):
+                    implied.append(prefix)
+            self._implied[key] = implied
+
+    def find(self, text):
+        """
+        Returns the set of tags found in the (already lowercased) text.
+        """
+        found = set()
+        if self._pattern is None:
+            return found
+
+        seen = set()
+        for match in self._pattern.finditer(text):
+            key = match.group(1)
+            if key in seen:
+                continue
+            seen.add(key)
+            for implied in self._implied[key]:
+                found.update(self._originals[implied])
+
+        return found
+
+
+@lru_cache(maxsize=8)
+def _compile_matcher(tags):
+    return TagMatcher(tags)
+
+
+def get_tag_matcher(tags):
+    """
+    Returns the compiled matcher for a tag list, building it on first use.
+    """
+    return _compile_matcher(tuple(tags))
@@ -0,0 +1,117 @@
+import importlib
+import threading
+
+import click
+
+# Tagger used when the configured one cannot run (missing config, errors)
+FALLBACK_TAGGER = "simple"
+
+
+class TaggerBackend:
+    """
+    A tagging method (TAGGING_METHOD) implemented by a module, imported only
+    on first use so heavy clients (openai, ...) cost nothing when unused.
+
+    The module provides `tag_many(grants, predefined_tags)`, returning a dict
+    mapping each grant ID to its tags or to the exception raised for that
+    grant, and optionally `warmup(app)`, called at app creation (see
+    init_taggers).
+
+    `required_config` lists the config keys the backend cannot run without.
+    Only `cached` backends (paid or slow ones) go through the tagging cache
+    (see tag_cache): for a fast local matcher, hashing the content and
+    looking it up costs more than tagging it again. The value of
+    `variant_config` (e.g. the model) is part of the cache key, so results
+    of different variants are never mixed.
+    """
+
+    def __init__(self, name, module, required_config=(), variant_config=None, cached=False):
+        self.name = name
+        self.module_name = module
+        self.required_config = tuple(required_config)
+        self.variant_config = variant_config
+        self.cached = cached
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    def missing_config(self, config):
+        """The required config keys that are not set."""
+        return [key for key in self.required_config if not config.get(key)]
+
+    def variant(self, config):
+        return config.get(self.variant_config) if self.variant_config else None
+
+    def tag_many(self, grants, predefined_tags):
+        return self.load().tag_many(grants, predefined_tags)
+
+    def warmup(self, app):
+        warmup = getattr(self.load(), "warmup", None)
+        if warmup is not None:
+            warmup(app)
+
+
+TAGGERS = {}
+
+
+def register_tagger(name, module, required_config=(), variant_config=None, cached=False):
+    """Registers a tagging method selectable with TAGGING_METHOD."""
+    TAGGERS[name] = TaggerBackend(name, module, required_config, variant_config, cached)
+    return TAGGERS[name]
+
+
+def get_tagger(name):
+    try:
+        return TAGGERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown TAGGING_METHOD '{name}' (available: {', '.join(sorted(TAGGERS))})") from None
+
+
+def init_taggers(app):
+    """
+    Validates TAGGING_METHOD when the app is created, so a typo fails at
+    startup instead of in every tagging call, and warms up the taggers
+    (TAGGER_WARMUP) for servers: WSGI servers and `flask run`. Other
+    `flask` CLI commands (`flask db upgrade`, ...) skip the warm-up: they
+    load the taggers on first use, if ever.
+    """
+    get_tagger(app.config['TAGGING_METHOD'])
+    ctx = click.get_current_context(silent=True)
+    if app.config['TAGGER_WARMUP'] and (ctx is None or ctx.info_name == "run"):
+        warmup_taggers(app)
+
+
+def warmup_taggers(app):
+    """
+    Imports and warms up the configured tagger (and the fallback one), so
+    the first upload of each worker does not pay for it. A failed warm-up
+    only logs an error: tagging then retries (or falls back) on first use.
+    """
+    tagger = get_tagger(app.config['TAGGING_METHOD'])
+    missing = tagger.missing_config(app.config)
+    if missing:
+        app.logger.warning(
+            f"Tagger '{tagger.name}' is missing {', '.join(missing)}; the '{FALLBACK_TAGGER}' tagger will be used."
+        )
+
+    with app.app_context():
+        for backend in {tagger, get_tagger(FALLBACK_TAGGER)}:
+            if backend.name != FALLBACK_TAGGER and missing:
+                continue
+            try:
+                backend.warmup(app)
+            except Exception as e:
+                app.logger.error(f"Warm-up of the '{backend.name}' tagger failed: {e}", exc_info=True)
+
+
+register_tagger("simple", "app.services.simple_tagger")
+register_tagger(
+    "llm", "app.services.llm_tagger",
+    required_config=("OPENAI_API_KEY",), variant_config="OPENAI_MODEL", cached=True,
+)
@@ -0,0 +1,146 @@
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.api.models import Grant, Tag, grant_tags
+from app.extensions import db
+from app.services.data_version import bump_grant_versions
+from app.services.tag_facets import adjust_tag_counts, tag_count_deltas
+from app.services.tagging_service import tag_grants
+from app.utils.db import chunked, dialect_insert
+
+
+def get_or_create_tag_ids(tag_names):
+    """
+    Resolves tag names to IDs, creating the missing tags.
+    Uses a single SELECT plus an INSERT ... ON CONFLICT DO NOTHING upsert,
+    so concurrent workers creating the same tag never collide.
+    """
+    tag_names = set(tag_names)
+    if not tag_names:
+        return {}
+
+    rows = db.session.execute(
+        select(Tag.name, Tag.id).where(Tag.name.in_(tag_names))
+    )
+    tag_ids = dict(rows.all())
+
+    missing = tag_names - tag_ids.keys()
+    if missing:
+        stmt = dialect_insert(Tag.__table__).values(
+            [{"name": name} for name in sorted(missing)]
+        ).on_conflict_do_nothing(index_elements=["name"])
+        db.session.execute(stmt)
+
+        # Re-select instead of RETURNING: rows inserted by a concurrent
+        # worker are skipped by ON CONFLICT and would not be returned.
+        rows = db.session.execute(
+            select(Tag.name, Tag.id).where(Tag.name.in_(missing))
+        )
+        tag_ids.update(rows.all())
+
+    return tag_ids
+
+
+def save_grant_tags(tags_by_grant):
+    """
+    Replaces the tags of several grants at once.
+    `tags_by_grant` maps a grant ID to the list of tag names to assign.
+    The tag_counts summary table is adjusted by the rows actually deleted
+    and inserted (RETURNING), so concurrent retags of the same grants never
+    apply the same delta twice. The versions of the grants are bumped.
+    Does not commit.
+    """
+    if not tags_by_grant:
+        return
+
+    all_names = {name for names in tags_by_grant.values() for name in names}
+    tag_ids = get_or_create_tag_ids(all_names)
+    grant_ids = list(tags_by_grant)
+
+    # Same semantics as assigning `grant.tags = [...]`: previous tags are replaced
+    deleted = db.session.scalars(
+        grant_tags.delete().where(grant_tags.c.grant_id.in_(grant_ids)).returning(grant_tags.c.tag_id)
+    ).all()
+
+    rows = [
+        {"grant_id": grant_id, "tag_id": tag_ids[name]}
+        for grant_id, names in tags_by_grant.items()
+        for name in set(names)
+    ]
+    inserted = []
+    if rows:
+        # Rows already written by a concurrent retag of the same grants are skipped, not counted
+        stmt = dialect_insert(grant_tags).on_conflict_do_nothing().returning(grant_tags.c.tag_id)
+        inserted = db.session.scalars(stmt, rows).all()
+
+    adjust_tag_counts(tag_count_deltas(Counter(deleted).items(), Counter(inserted).items()))
+    bump_grant_versions(grant_ids)
+
+
+def _tag_chunk(grant_ids):
+    """
+    Tags one chunk of grants and commits it.
+    Returns a (succeeded, failed) tuple of grant ID lists.
+    """
+    # --- 1. Load the whole chunk with a single IN (...) query ---
+    rows = db.session.execute(
+        select(Grant.id, Grant.name, Grant.description).where(Grant.id.in_(grant_ids))
+    ).all()
+
+    found_ids = {row.id for row in rows}
+    failed = [grant_id for grant_id in grant_ids if grant_id not in found_ids]
+    for grant_id in failed:
+        current_app.logger.warning(f"[BG-TASK] Grant {grant_id} not found for tagging.")
+
+    # --- 2. Compute tags; a failing grant is skipped, not the whole chunk ---
+    current_app.logger.debug(f"[BG-TASK] Tagging {len(rows)} grants.")
+    tags_by_grant = tag_grants(rows)
+    failed.extend(row.id for row in rows if row.id not in tags_by_grant)
+
+    # --- 3. Persist the chunk in one transaction ---
+    try:
+        save_grant_tags(tags_by_grant)
+        db.session.commit()
+        return list(tags_by_grant), failed
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(
+            f"[BG-TASK] Bulk save failed for a chunk of {len(tags_by_grant)} grants ({e}). "
+            "Retrying grant by grant."
+        )
+
+    # --- 4. Fallback: isolate the bad grant(s) ---
+    succeeded = []
+    for grant_id, names in tags_by_grant.items():
+        try:
+            save_grant_tags({grant_id: names})
+            db.session.commit()
+            succeeded.append(grant_id)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"[BG-TASK] Failed to save tags for grant {grant_id}: {e}", exc_info=True)
+            failed.append(grant_id)
+
+    return succeeded, failed
+
+
+def run_tagging_pipeline(grant_ids, chunk_size=None):
+    """
+    Tags the given grants in chunks, committing once per chunk.
+    Must be called inside an app context.
+    Returns a (succeeded, failed) tuple of grant ID lists.
+    """
+    chunk_size = chunk_size or current_app.config['TAGGING_CHUNK_SIZE']
+
+    succeeded, failed = [], []
+    for chunk in chunked(grant_ids, chunk_size):
+        chunk_succeeded, chunk_failed = _tag_chunk(chunk)
+        succeeded.extend(chunk_succeeded)
+        failed.extend(chunk_failed)
+        current_app.logger.info(
+            f"[BG-TASK] Chunk done: {len(chunk_succeeded)} tagged, {len(chunk_failed)} failed."
+        )
+
+    return succeeded, failed
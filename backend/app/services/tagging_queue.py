@@ -0,0 +1,315 @@
+import datetime
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.models import TaggingJob, TaggingJobItem, utcnow
+from app.extensions import db
+from app.profiling import profile_job
+from app.services.tagging_pipeline import run_tagging_pipeline
+from app.utils.db import chunked
+
+
+class TaggingQueue:
+    """
+    Durable, bounded queue of tagging jobs.
+
+    Jobs and their grant IDs live in the `tagging_jobs` / `tagging_job_items`
+    tables, so nothing is lost on restart. An in-memory bounded queue feeds
+    a fixed pool of worker threads; jobs that do not fit in it stay
+    'pending' in the DB and are picked up by idle workers.
+
+    With TAGGING_WORKERS = 0 jobs run inline, in the caller's thread
+    (useful for tests and one-off scripts).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._workers = []
+        self._lock = threading.Lock()
+        self._next_recovery = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self._queue = queue.Queue(maxsize=app.config['TAGGING_QUEUE_MAXSIZE'])
+        app.extensions['tagging_queue'] = self
+
+        # Workers start with the first request of the process, not at import
+        # time, so CLI commands like `flask db upgrade` never spawn them.
+        @app.before_request
+        def _start_tagging_workers():
+            if not self._workers:
+                self.start()
+
+    # --- Producer side ---
+
+    def create_job(self, grant_ids, status="pending"):
+        """
+        Stores a new job with its grant IDs. Does not commit: callers commit
+        it in the transaction that inserts the grants, so no grant is ever
+        stored without a job to tag it.
+        Jobs created as 'receiving' can still grow (see `add_job_items`) and
+        are not claimed by workers until `release_job` is called.
+        Returns the job.
+        """
+        job = TaggingJob(status=status, total=0, processed=0, failed=0)
+        db.session.add(job)
+        db.session.flush()
+
+        self.add_job_items(job.id, grant_ids)
+        return job
+
+    def add_job_items(self, job_id, grant_ids):
+        """Adds grant IDs to a stored job. Does not commit."""
+        for ids in chunked(grant_ids, current_app.config['BULK_INSERT_CHUNK_SIZE']):
+            db.session.execute(
+                TaggingJobItem.__table__.insert(),
+                [{"job_id": job_id, "grant_id": grant_id, "status": "pending"} for grant_id in ids]
+            )
+
+        db.session.execute(
+            update(TaggingJob)
+            .where(TaggingJob.id == job_id)
+            .values(total=TaggingJob.total + len(grant_ids), updated_at=utcnow())
+        )
+
+    def release_job(self, job_id):
+        """Marks a 'receiving' job as complete, so workers can claim it, and commits."""
+        db.session.execute(
+            update(TaggingJob)
+            .where(TaggingJob.id == job_id, TaggingJob.status == "receiving")
+            .values(status="pending", updated_at=utcnow())
+        )
+        db.session.commit()
+
+    def is_full(self):
+        """True when new uploads should be rejected (backpressure)."""
+        return self.app.config['TAGGING_WORKERS'] > 0 and self._queue.full()
+
+    def submit(self, job_id):
+        """
+        Hands a stored job to the worker pool.
+        If the queue is full, the job stays 'pending' in the DB and an
+        idle worker will claim it later.
+        """
+        if self.app.config['TAGGING_WORKERS'] == 0:
+            self._run_job(job_id)
+            return
+
+        try:
+            self._queue.put(job_id, timeout=self.app.config['TAGGING_QUEUE_SUBMIT_TIMEOUT'])
+        except queue.Full:
+            current_app.logger.warning(f"[BG-TASK] Tagging queue is full, job {job_id} left pending in DB.")
+
+    def depth(self):
+        """Number of jobs waiting in the in-memory queue (0 before `init_app`)."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # --- Worker side ---
+
+    def start(self):
+        """Recovers interrupted jobs and starts the worker pool."""
+        with self._lock:
+            if self._workers or self.app.config['TAGGING_WORKERS'] == 0:
+                return
+
+            self._recover()
+
+            for index in range(self.app.config['TAGGING_WORKERS']):
+                worker = threading.Thread(
+                    target=self._worker_loop, name=f"tagging-worker-{index}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+            self.app.logger.info(f"[BG-TASK] Started {len(self._workers)} tagging workers.")
+
+    def _recover(self):
+        """
+        Requeues jobs interrupted by a restart (see `_requeue_stale_jobs`)
+        and feeds the pending jobs to the workers.
+        """
+        with self.app.app_context():
+            try:
+                recovered = self._requeue_stale_jobs()
+                pending = db.session.scalars(
+                    select(TaggingJob.id).where(TaggingJob.status == "pending").order_by(TaggingJob.id)
+                ).all()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                self.app.logger.warning(f"[BG-TASK] Could not recover tagging jobs: {e}")
+                return
+
+            if recovered or pending:
+                self.app.logger.info(f"[BG-TASK] Recovered {recovered} interrupted jobs, {len(pending)} pending.")
+            for job_id in pending:
+                try:
+                    self._queue.put_nowait(job_id)
+                except queue.Full:
+                    break # The rest is claimed by idle workers
+
+    def _requeue_stale_jobs(self):
+        """
+        'running' jobs (and streamed uploads left 'receiving') whose heartbeat
+        is older than TAGGING_JOB_STALE_SECONDS go back to 'pending', and are
+        claimed again by any worker. Commits. Returns the number of jobs.
+        """
+        stale_before = utcnow() - datetime.timedelta(seconds=self.app.config['TAGGING_JOB_STALE_SECONDS'])
+        result = db.session.execute(
+            update(TaggingJob)
+            .where(
+                TaggingJob.status.in_(("running", "receiving")),
+                TaggingJob.updated_at < stale_before,
+            )
+            .values(status="pending")
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def _recover_if_due(self):
+        """
+        Runs the stale job check every TAGGING_RECOVERY_INTERVAL seconds (one
+        worker per process), so jobs of a process that died are recovered
+        even if no new process starts after their heartbeat went stale.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_recovery:
+                return
+            self._next_recovery = now + self.app.config['TAGGING_RECOVERY_INTERVAL']
+
+        with self.app.app_context():
+            try:
+                recovered = self._requeue_stale_jobs()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                self.app.logger.warning(f"[BG-TASK] Could not recover tagging jobs: {e}")
+                return
+        if recovered:
+            self.app.logger.info(f"[BG-TASK] Recovered {recovered} interrupted jobs.")
+
+    def _worker_loop(self):
+        poll_interval = self.app.config['TAGGING_QUEUE_POLL_INTERVAL']
+        while True:
+            try:
+                job_id = self._queue.get(timeout=poll_interval)
+            except queue.Empty:
+                job_id = None
+
+            try:
+                if job_id is None:
+                    self._recover_if_due()
+                    job_id = self._next_pending_job()
+                if job_id is not None:
+                    self._run_job(job_id)
+            except Exception as e:
+                self.app.logger.error(f"[BG-TASK] Tagging worker error: {e}", exc_info=True)
+
+    def _next_pending_job(self):
+        """Returns the oldest job left pending in the DB, if any."""
+        with self.app.app_context():
+            return db.session.scalar(
+                select(TaggingJob.id).where(TaggingJob.status == "pending").order_by(TaggingJob.id).limit(1)
+            )
+
+    def _run_job(self, job_id):
+        with self.app.app_context():
+            # Atomically claim the job so two workers (or processes) never run it twice
+            claimed = db.session.execute(
+                update(TaggingJob)
+                .where(TaggingJob.id == job_id, TaggingJob.status == "pending")
+                .values(status="running", updated_at=utcnow())
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+
+            current_app.logger.info(f"[BG-TASK] Starting tagging job {job_id}.")
+            chunk_size = current_app.config['TAGGING_CHUNK_SIZE']
+
+            with profile_job(self.app, f"tagging job {job_id}"), self._heartbeat(job_id):
+                while True:
+                    grant_ids = db.session.scalars(
+                        select(TaggingJobItem.grant_id)
+                        .where(TaggingJobItem.job_id == job_id, TaggingJobItem.status == "pending")
+                        .order_by(TaggingJobItem.grant_id)
+                        .limit(chunk_size)
+                    ).all()
+                    if not grant_ids:
+                        break
+
+                    succeeded, failed = run_tagging_pipeline(grant_ids, chunk_size=chunk_size)
+                    self._record_progress(job_id, succeeded, failed)
+
+                db.session.execute(
+                    update(TaggingJob).where(TaggingJob.id == job_id).values(status="completed", updated_at=utcnow())
+                )
+                db.session.commit()
+
+            job = db.session.get(TaggingJob, job_id)
+            current_app.logger.info(
+                f"[BG-TASK] Tagging job {job_id} finished: {job.processed} tagged, {job.failed} failed."
+            )
+
+    @contextmanager
+    def _heartbeat(self, job_id):
+        """
+        Bumps the heartbeat of a running job every third of
+        TAGGING_JOB_STALE_SECONDS from a side thread, so a chunk that takes
+        longer than that (slow LLM calls) is not recovered and tagged twice.
+        """
+        stop = threading.Event()
+        interval = self.app.config['TAGGING_JOB_STALE_SECONDS'] / 3
+
+        def beat():
+            while not stop.wait(interval):
+                with self.app.app_context():
+                    try:
+                        db.session.execute(
+                            update(TaggingJob)
+                            .where(TaggingJob.id == job_id, TaggingJob.status == "running")
+                            .values(updated_at=utcnow())
+                        )
+                        db.session.commit()
+                    except SQLAlchemyError as e:
+                        db.session.rollback()
+                        self.app.logger.warning(f"[BG-TASK] Heartbeat of job {job_id} failed: {e}")
+
+        thread = threading.Thread(target=beat, name=f"tagging-heartbeat-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _record_progress(self, job_id, succeeded, failed):
+        for status, grant_ids in (("done", succeeded), ("failed", failed)):
+            if grant_ids:
+                db.session.execute(
+                    update(TaggingJobItem)
+                    .where(TaggingJobItem.job_id == job_id, TaggingJobItem.grant_id.in_(grant_ids))
+                    .values(status=status)
+                )
+
+        db.session.execute(
+            update(TaggingJob)
+            .where(TaggingJob.id == job_id)
+            .values(
+                processed=TaggingJob.processed + len(succeeded),
+                failed=TaggingJob.failed + len(failed),
+                updated_at=utcnow(),
+            )
+        )
+        db.session.commit()
+
+
+tagging_queue = TaggingQueue()
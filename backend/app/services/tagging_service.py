@@ -1,138 +1,114 @@
-import re
+from types import SimpleNamespace
 from flask import current_app
 
-import re
-import json
-from flask import current_app
-from openai import OpenAI, OpenAIError
-
-_openai_client = None
+from app.metrics import TAGGED_GRANTS, TAGGING_DURATION, TAGGING_FALLBACKS
+from app.services.simple_tagger import simple_string_match_tagger, tagging_text # noqa: F401 (re-exported)
+from app.services.tag_cache import get_tag_cache, tagging_cache_key, vocabulary_version
+from app.services.tagger_registry import FALLBACK_TAGGER, get_tagger
 
-# --- NEW DISPATCHER FUNCTION ---
+# --- DISPATCHER FUNCTIONS ---
 
 def tag_grant(description, name):
     """
-    Dispatches the tagging request to the method specified in the config.
-    Falls back to 'simple' if 'llm' is configured but fails.
+    Tags a single grant with the method specified in the config.
+    Falls back to 'simple' if the configured tagger cannot run or fails.
     """
-    method = current_app.config.get('TAGGING_METHOD', 'simple')
-    
-    if method == 'llm':
-        try:
-            # Try to get tags from the LLM
-            current_app.logger.debug("Using LLM tagger for tagging.")
-            return _get_llm_tags(description, name)
-        except Exception as e:
-            # If LLM tagging fails for any reason, log it and fall back
-            current_app.logger.error(f"LLM tagging failed: {e}. Falling back to simple tagger.", exc_info=True)
-            return simple_string_match_tagger(description, name)
-    
-    # Default to simple string matching
-    current_app.logger.debug("Using simple string match tagger for tagging.")
-    return simple_string_match_tagger(description, name)
-
-# --- SIMPLE (DEFAULT) TAGGER ---
-
-def simple_string_match_tagger(description, name):
-    """
-    Performs a simple, case-insensitive string match against the
-    grant description and name.
-    """
-    predefined_tags = current_app.config["PREDEFINED_TAGS"]
-    found_tags = set()
-
-    # Combine name and description for searching
-    text_to_search = description.lower() + " " + name.lower()
+    grant = SimpleNamespace(id=0, name=name, description=description)
+    tags_by_grant = tag_grants([grant])
 
-    for tag in predefined_tags:
-        # Use regex \b (word boundary) to find the exact word/tag
-        # re.escape handles tags with hyphens like 'cost-share'
-        pattern = r"\b" + re.escape(tag.lower()) + r"\b"
+    if grant.id not in tags_by_grant:
+        raise RuntimeError(f"Could not tag grant '{name}'.")
+    return tags_by_grant[grant.id]
 
-        if re.search(pattern, text_to_search):
-            found_tags.add(tag)
-
-    return list(found_tags)
-
-# --- LLM (ADVANCED) TAGGER ---
-
-def _get_llm_tags(description, name):
+def tag_grants(grants, method=None):
     """
-    Uses the OpenAI API to assign tags.
-    (Private function, called by tag_grant dispatcher)
+    Tags several grants at once (objects with id, name and description),
+    with `method` or else the configured TAGGING_METHOD.
+    The configured backend (see tagger_registry) tags them as a batch, e.g.
+    concurrently for 'llm'; each grant it fails on falls back to the simple
+    tagger on its own.
+    Results of cached backends (e.g. 'llm', not 'simple') are looked up in /
+    stored to the tagging cache (see tag_cache), so already-seen content is
+    never sent to them twice.
+    Returns a dict mapping grant IDs to tag lists. Grants that could not be
+    tagged at all are logged and left out.
     """
-    global _openai_client
-
-    api_key = current_app.config.get('OPENAI_API_KEY')
-    if not api_key:
-        current_app.logger.warning("OPENAI_API_KEY is not set. Falling back to simple tagger.")
-        return simple_string_match_tagger(description, name)
-    
-    if _openai_client is None:
-        current_app.logger.info("Initializing OpenAI client for the first time.")
+    method = method or current_app.config.get('TAGGING_METHOD', 'simple')
+    tagger = get_tagger(method)
+    predefined_tags = current_app.config['PREDEFINED_TAGS']
+
+    # --- 1. Serve what we can from the cache ---
+    tags_by_grant = {}
+    cache = get_tag_cache() if tagger.cached else None
+    if cache is not None and grants:
+        model = tagger.variant(current_app.config)
+        tags_version = vocabulary_version(predefined_tags)
+        cache_keys = {
+            grant.id: tagging_cache_key(grant.name, grant.description, method, model, tags_version)
+            for grant in grants
+        }
+        cached = cache.get_many(set(cache_keys.values()))
+        tags_by_grant = {
+            grant_id: cached[key] for grant_id, key in cache_keys.items() if key in cached
+        }
+        grants = [grant for grant in grants if grant.id not in tags_by_grant]
+        if tags_by_grant:
+            TAGGED_GRANTS.inc(len(tags_by_grant), method="cache")
+
+    # --- 2. Tag the rest with the configured backend ---
+    results = {}
+    missing = tagger.missing_config(current_app.config)
+    if grants and missing:
+        current_app.logger.warning(
+            f"{', '.join(missing)} not set for the '{method}' tagger. Falling back to simple tagger."
+        )
+        TAGGING_FALLBACKS.inc(len(grants), reason="missing_config")
+    elif grants:
         try:
-            _openai_client = OpenAI(api_key=api_key)
+            current_app.logger.debug(f"Using the '{method}' tagger for {len(grants)} grants.")
+            with TAGGING_DURATION.time(method=method):
+                results = tagger.tag_many(grants, predefined_tags)
         except Exception as e:
-             current_app.logger.error(f"Failed to initialize OpenAI client: {e}", exc_info=True)
-             return simple_string_match_tagger(description, name)
-
-    client = _openai_client
-    
-    try:
-        client = OpenAI(api_key=api_key)
-        
-        predefined_tags_str = ", ".join(current_app.config['PREDEFINED_TAGS'])
-
-        system_prompt = f"""
-        You are an expert grant categorization system. Your task is to analyze a grant
-        and assign relevant tags from a predefined list.
-        
-        RULES:
-        1. You MUST only use tags from this exact list:
-           {predefined_tags_str}
-        2. You MUST return a valid JSON object in the format: {{"tags": ["tag1", "tag2", ...]}}
-        3. Do not include any tags that are not in the list.
-        4. Do not include any explanation or other text.
-        5. If no tags from the list are relevant, return an empty list: {{"tags": []}}
-        """
-        
-        user_prompt = f"""
-        Please categorize the following grant:
-        Grant Name: {name}
-        Description: {description}
-        """
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini", # Fast, cheap, and effective
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.1 # Low temperature for more predictable, less "creative" results
-        )
-        
-        # Parse the JSON response
-        response_content = response.choices[0].message.content
-        if not response_content:
-            raise ValueError("OpenAI returned an empty response.")
-            
-        data = json.loads(response_content)
-        
-        if "tags" not in data or not isinstance(data["tags"], list):
-             raise ValueError(f"LLM returned invalid JSON structure: {data}")
-        
-        # Final validation: Ensure all tags are from the predefined list
-        valid_tags = set(current_app.config['PREDEFINED_TAGS'])
-        final_tags = [tag for tag in data["tags"] if tag in valid_tags]
-        
-        return final_tags
-        
-    except OpenAIError as e:
-        current_app.logger.error(f"OpenAI API error: {e}", exc_info=True)
-        # Fallback to simple tagger on API failure
-        return simple_string_match_tagger(description, name)
-    except (json.JSONDecodeError, ValueError) as e:
-        current_app.logger.error(f"Failed to parse LLM response: {e}", exc_info=True)
-        # Fallback to simple tagger on parsing failure
-        return simple_string_match_tagger(description, name)
\ No newline at end of file
+            current_app.logger.error(
+                f"Tagger '{method}' failed: {e}. Falling back to simple tagger.", exc_info=True
+            )
+            TAGGING_FALLBACKS.inc(len(grants), reason="backend_error")
+
+    # Only results of the configured backend are cached, never fallbacks
+    fresh = {}
+    fallback = []
+    for grant in grants:
+        result = results.get(grant.id)
+        if isinstance(result, list):
+            tags_by_grant[grant.id] = fresh[grant.id] = result
+            continue
+
+        if method == FALLBACK_TAGGER and result is not None:
+            current_app.logger.error(f"Failed to tag grant {grant.id}: {result}", exc_info=result)
+            continue
+        if isinstance(result, Exception):
+            current_app.logger.error(
+                f"Tagger '{method}' failed for grant {grant.id}: {result}. Falling back to simple tagger."
+            )
+            TAGGING_FALLBACKS.inc(reason="grant_error")
+        fallback.append(grant)
+
+    if fresh:
+        TAGGED_GRANTS.inc(len(fresh), method=method)
+    if fallback:
+        fallback_count = 0
+        with TAGGING_DURATION.time(method="fallback"):
+            fallback_results = get_tagger(FALLBACK_TAGGER).tag_many(fallback, predefined_tags)
+        for grant_id, result in fallback_results.items():
+            if isinstance(result, Exception):
+                current_app.logger.error(f"Failed to tag grant {grant_id}: {result}", exc_info=result)
+            else:
+                tags_by_grant[grant_id] = result
+                fallback_count += 1
+        TAGGED_GRANTS.inc(fallback_count, method="fallback")
+
+    # --- 3. Store the new results ---
+    if cache is not None and fresh:
+        cache.set_many({cache_keys[grant_id]: tags for grant_id, tags in fresh.items()})
+
+    return tags_by_grant
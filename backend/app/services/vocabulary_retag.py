@@ -0,0 +1,180 @@
+import json
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.api.models import Grant, Tag, TagCount, TagVocabulary, grant_tags, utcnow
+from app.extensions import db
+from app.services.data_version import bump_grant_versions
+from app.services.tag_cache import vocabulary_version
+from app.services.tag_facets import adjust_tag_counts
+from app.services.tag_matcher import TagMatcher
+from app.services.tagging_pipeline import get_or_create_tag_ids
+from app.services.simple_tagger import tagging_text
+from app.utils.db import dialect_insert
+
+
+def _latest(status):
+    return db.session.scalar(
+        select(TagVocabulary).where(TagVocabulary.status == status).order_by(TagVocabulary.id.desc()).limit(1)
+    )
+
+
+def vocabulary_diff():
+    """
+    Compares the configured PREDEFINED_TAGS with the vocabulary applied to
+    the corpus. Returns a dict with the current version, the applied one
+    and the 'added' / 'removed' tag names.
+
+    If a previous run for another vocabulary was interrupted, its added tags
+    may be partially applied: they are re-scanned if still wanted and
+    removed otherwise.
+    """
+    current = sorted(set(current_app.config['PREDEFINED_TAGS']))
+    applied = _latest("applied")
+    applied_tags = set(json.loads(applied.tags)) if applied else None
+
+    pending = _latest("retagging")
+    if pending is not None and (applied is None or pending.id > applied.id):
+        pending_tags = set(json.loads(pending.tags))
+        fully_applied = (applied_tags or set()) & pending_tags
+        maybe_applied = (applied_tags or set()) | pending_tags
+    else:
+        pending = None
+        fully_applied = maybe_applied = applied_tags or set()
+
+    return {
+        "version": vocabulary_version(current),
+        "appliedVersion": applied.version if applied else None,
+        "tags": current,
+        "added": sorted(set(current) - fully_applied),
+        "removed": sorted(maybe_applied - set(current)),
+        "pending": pending,
+    }
+
+
+def remove_tags(tag_names):
+    """
+    Removes tags from every grant with one set-based DELETE on grant_tags
+    (plus their tag and tag_counts rows); the affected grants get a new
+    version. Does not commit. Returns the number of grant_tags rows deleted.
+    """
+    tag_ids = db.session.scalars(select(Tag.id).where(Tag.name.in_(tag_names))).all()
+    if not tag_ids:
+        return 0
+
+    bump_grant_versions(select(grant_tags.c.grant_id).where(grant_tags.c.tag_id.in_(tag_ids)).distinct())
+    deleted = db.session.execute(grant_tags.delete().where(grant_tags.c.tag_id.in_(tag_ids))).rowcount
+    db.session.execute(TagCount.__table__.delete().where(TagCount.tag_id.in_(tag_ids)))
+    db.session.execute(Tag.__table__.delete().where(Tag.id.in_(tag_ids)))
+    return deleted
+
+
+def add_tags_batch(matcher, tag_ids, after_id, batch_size):
+    """
+    Scans the next `batch_size` grants after `after_id` for the added tags
+    only and inserts the new grant_tags rows (existing ones are kept).
+    Does not commit. Returns (last scanned grant ID or None, rows added).
+    """
+    rows = db.session.execute(
+        select(Grant.id, Grant.name, Grant.description)
+        .where(Grant.id > after_id)
+        .order_by(Grant.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None, 0
+
+    new_rows = [
+        {"grant_id": row.id, "tag_id": tag_ids[tag]}
+        for row in rows
+        for tag in matcher.find(tagging_text(row.description, row.name))
+    ]
+
+    inserted = []
+    if new_rows:
+        stmt = (
+            dialect_insert(grant_tags)
+            .values(new_rows)
+            .on_conflict_do_nothing()
+            .returning(grant_tags.c.grant_id, grant_tags.c.tag_id)
+        )
+        inserted = db.session.execute(stmt).all()
+
+    if inserted:
+        adjust_tag_counts(Counter(tag_id for _, tag_id in inserted))
+        bump_grant_versions(sorted({grant_id for grant_id, _ in inserted}))
+
+    return rows[-1].id, len(inserted)
+
+
+def retag_vocabulary(batch_size=None, log=None):
+    """
+    Brings the corpus up to date with the configured PREDEFINED_TAGS by
+    applying only the difference with the stored vocabulary:
+    - removed tags: one set-based delete (committed with the new run)
+    - added tags: the matcher runs for the added tags alone, in batches of
+      grants; the checkpoint is committed with each batch, so an
+      interrupted run resumes where it stopped
+    Grants that match none of the added tags are left untouched.
+
+    The first run on a database only records the current vocabulary.
+    Returns the diff (see `vocabulary_diff`).
+    """
+    batch_size = batch_size or current_app.config['RETAG_BATCH_SIZE']
+    log = log or current_app.logger.info
+    diff = vocabulary_diff()
+
+    if diff["appliedVersion"] is None and diff["pending"] is None:
+        db.session.add(TagVocabulary(version=diff["version"], tags=json.dumps(diff["tags"]), status="applied"))
+        db.session.commit()
+        log(f"No stored vocabulary: recorded version {diff['version']} ({len(diff['tags'])} tags) as applied.")
+        return diff
+
+    if diff["appliedVersion"] == diff["version"] and diff["pending"] is None:
+        log(f"Vocabulary {diff['version']} is already applied.")
+        return diff
+
+    # --- 1. Resume the run for this vocabulary, or start a new one ---
+    run = diff["pending"]
+    if run is not None and run.version == diff["version"]:
+        added = json.loads(run.added)
+        log(f"Resuming vocabulary {run.version} after grant {run.checkpoint_grant_id}.")
+    else:
+        if run is not None:
+            run.status = "superseded"
+        added = diff["added"]
+        run = TagVocabulary(
+            version=diff["version"],
+            tags=json.dumps(diff["tags"]),
+            added=json.dumps(added),
+            removed=json.dumps(diff["removed"]),
+        )
+        db.session.add(run)
+
+        deleted = remove_tags(diff["removed"]) if diff["removed"] else 0
+        db.session.commit()
+        log(f"Vocabulary {run.version}: removed {diff['removed']} ({deleted} grant tags), adding {added}.")
+
+    # --- 2. Scan the corpus for the added tags only ---
+    if added:
+        matcher = TagMatcher(added)
+        tag_ids = get_or_create_tag_ids(added)
+        added_total = 0
+        while True:
+            last_id, added_rows = add_tags_batch(matcher, tag_ids, run.checkpoint_grant_id, batch_size)
+            if last_id is None:
+                break
+            run.checkpoint_grant_id = last_id
+            db.session.commit()
+
+            added_total += added_rows
+            log(f"Scanned up to grant {last_id}: {added_rows} tags added ({added_total} in total).")
+
+    # --- 3. Mark the vocabulary as applied ---
+    run.status = "applied"
+    run.updated_at = utcnow()
+    db.session.commit()
+    log(f"Vocabulary {run.version} applied.")
+    return diff
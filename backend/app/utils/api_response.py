@@ -1,32 +1,31 @@
 import datetime
 from flask import jsonify, request
 
-def success_response(data, message="Success", status_code=200):
+def _envelope(status, status_code, message, data, error_code):
     """
-    Generates a standardized success response.
+    Builds the standardized response envelope.
+    jsonify goes through the app's JSON provider (orjson when available).
     """
     return jsonify({
-        "status": "SUCCESS",
+        "status": status,
         "statusCode": status_code,
         "message": message,
         "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "path": request.path,
         "data": data,
-        "errorCode": None
+        "errorCode": error_code
     }), status_code
 
+def success_response(data, message="Success", status_code=200):
+    """
+    Generates a standardized success response.
+    """
+    return _envelope("SUCCESS", status_code, message, data, None)
+
 def error_response(message, error_code, status_code):
     """
     Generates a standardized error response.
     """
     # It's important to log the error on the server
     # (We will do this in the global error handler)
-    return jsonify({
-        "status": "ERROR",
-        "statusCode": status_code,
-        "message": message,
-        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        "path": request.path,
-        "data": None,
-        "errorCode": error_code
-    }), status_code
\ No newline at end of file
+    return _envelope("ERROR", status_code, message, None, error_code)
\ No newline at end of file
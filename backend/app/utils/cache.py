@@ -0,0 +1,170 @@
+import datetime
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import delete, select
+
+from app.api.models import CacheEntry
+from app.extensions import db
+from app.utils.db import dialect_insert
+
+
+class CacheBackend:
+    """
+    Base class for cache backends. Keeps hit/miss counters.
+    Subclasses implement `_get_many` and `set_many`.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss."""
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value, size=None):
+        """`size`: bytes of the value, when the caller already knows it (see LRUCache `maxbytes`)."""
+        self.set_many({key: value}, None if size is None else {key: size})
+
+    def get_many(self, keys):
+        """Returns a dict with the cached values of the keys that were found."""
+        keys = list(keys)
+        found = self._get_many(keys) if keys else {}
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _get_many(self, keys):
+        raise NotImplementedError
+
+    def set_many(self, items, sizes=None):
+        raise NotImplementedError
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LRUCache(CacheBackend):
+    """
+    In-process LRU cache with an optional TTL (seconds).
+    Thread-safe; each process (worker) has its own copy.
+
+    With `maxbytes`, least recently used entries are also evicted once the
+    total size of the entries exceeds it: the size given to `set` /
+    `set_many`, or else `sizeof(value)`.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None, maxbytes=None, sizeof=None):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.size = 0
+        self._data = OrderedDict() # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    def _get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                expires_at, size, value = entry
+                if expires_at is not None and expires_at <= now:
+                    self._evict(key)
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, items, sizes=None):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        sizes = sizes or {}
+        sized = {
+            key: (sizes[key] if key in sizes else self.sizeof(value), value) for key, value in items.items()
+        }
+        with self._lock:
+            for key, (size, value) in sized.items():
+                if self.maxbytes and size > self.maxbytes:
+                    continue # Would evict everything else
+                if key in self._data:
+                    self._evict(key)
+                self._data[key] = (expires_at, size, value)
+                self.size += size
+            while len(self._data) > self.maxsize or (self.maxbytes and self.size > self.maxbytes):
+                self._evict(next(iter(self._data)))
+
+    def _evict(self, key):
+        self.size -= self._data.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def stats(self):
+        stats = {**super().stats(), "entries": len(self._data)}
+        if self.maxbytes:
+            stats["bytes"] = self.size
+        return stats
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLCache(CacheBackend):
+    """
+    Cache stored in the `cache_entries` table, shared by every worker and
+    process using the same database. Values must be JSON-serializable.
+    Writes join the caller's transaction (they are not committed here).
+    """
+
+    def __init__(self, namespace, ttl=None):
+        super().__init__()
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _get_many(self, keys):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = db.session.execute(
+            select(CacheEntry.key, CacheEntry.value).where(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.key.in_(keys),
+                (CacheEntry.expires_at.is_(None)) | (CacheEntry.expires_at > now),
+            )
+        )
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_many(self, items, sizes=None):
+        if not items:
+            return
+
+        expires_at = None
+        if self.ttl:
+            expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=self.ttl)
+
+        stmt = dialect_insert(CacheEntry.__table__).values([
+            {"namespace": self.namespace, "key": key, "value": json.dumps(value), "expires_at": expires_at}
+            for key, value in items.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["namespace", "key"],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        )
+        db.session.execute(stmt)
+
+    def clear(self):
+        db.session.execute(delete(CacheEntry).where(CacheEntry.namespace == self.namespace))
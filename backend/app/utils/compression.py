@@ -0,0 +1,65 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError: # Optional dependency: only gzip is offered without it
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/csv", "application/x-ndjson"}
+
+
+def choose_encoding():
+    """Returns 'br', 'gzip' or None for the current request's Accept-Encoding."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality("br") > 0:
+        return "br"
+    if accepted.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding, level):
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level)
+
+
+def init_compression(app):
+    """
+    Compresses response bodies above COMPRESSION_MIN_SIZE bytes with brotli
+    (when installed) or gzip, according to the client's Accept-Encoding.
+    Streamed responses are left untouched.
+    """
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+
+    @app.after_request
+    def _compress_response(response):
+        response.vary.add("Accept-Encoding")
+
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        encoding = choose_encoding()
+        if encoding is None:
+            return response
+
+        level = app.config['BROTLI_QUALITY'] if encoding == "br" else app.config['GZIP_LEVEL']
+        response.set_data(compress(body, encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,33 @@
+from flask import current_app, request
+from werkzeug.http import http_date, quote_etag
+
+
+def validator_headers(etag, last_modified=None):
+    """
+    Response headers for a conditional GET: a weak ETag (bodies may be
+    compressed on the way out), Last-Modified, and no-cache so clients
+    revalidate on every poll instead of reusing a stale body.
+    """
+    headers = {"ETag": quote_etag(etag, weak=True), "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Returns a 304 response when the client's If-None-Match (or, without it,
+    If-Modified-Since) still matches, else None.
+    Call it before running the main query of the endpoint.
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        # HTTP dates have a one second resolution
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    return current_app.response_class(status=304, headers=validator_headers(etag, last_modified))
@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+
+def dialect_name():
+    """Returns the name of the dialect of the primary engine ('postgresql', 'sqlite', ...)."""
+    return db.engine.dialect.name
+
+
+def dialect_insert(table):
+    """
+    Returns an INSERT construct for the current dialect.
+    Dialect-specific inserts support ON CONFLICT clauses (upserts).
+    """
+    if dialect_name() == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name() == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upserts are not supported for dialect '{dialect_name()}'")
+
+
+def chunked(items, size):
+    """Yields successive lists of at most `size` items."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
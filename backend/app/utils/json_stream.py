@@ -0,0 +1,98 @@
+import codecs
+import json
+
+
+class RecordError(ValueError):
+    """A record of the stream could not be parsed. `fatal` errors end the stream."""
+
+    def __init__(self, message, fatal=False):
+        super().__init__(message)
+        self.fatal = fatal
+
+
+def iter_ndjson(stream):
+    """
+    Yields one item per line of an NDJSON (JSON Lines) byte stream: the
+    parsed value, or a RecordError for a line that is not valid JSON.
+    Blank lines are ignored. Only one line is held in memory at a time.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e: # Invalid JSON or UTF-8
+            yield RecordError(f"Invalid JSON: {e}")
+
+
+def iter_json_array(stream, read_size=65536, max_item_size=1048576):
+    """
+    Yields the items of a top-level JSON array, parsed incrementally from a
+    byte stream read `read_size` bytes at a time. Only the current item and
+    one read buffer are held in memory.
+
+    A syntax error, or an item longer than `max_item_size` characters, ends
+    the array: a fatal RecordError is yielded last.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        # Drops the consumed prefix and appends the next block of the stream
+        nonlocal buffer, pos, eof
+        block = stream.read(read_size)
+        eof = not block
+        buffer = buffer[pos:] + utf8.decode(block, final=eof)
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    try:
+        skip_whitespace()
+        if buffer[pos:pos + 1] != "[":
+            yield RecordError("Expected a JSON array.", fatal=True)
+            return
+        pos += 1
+
+        skip_whitespace()
+        if buffer[pos:pos + 1] == "]":
+            return
+
+        while True:
+            skip_whitespace()
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A value ending at the edge of the buffer (e.g. a number) may continue
+                if end == len(buffer) and not eof:
+                    raise ValueError("Incomplete value")
+            except ValueError:
+                if eof or len(buffer) - pos > max_item_size:
+                    yield RecordError("Invalid JSON in the array.", fatal=True)
+                    return
+                fill()
+                continue
+
+            pos = end
+            yield item
+
+            skip_whitespace()
+            separator = buffer[pos:pos + 1]
+            pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                yield RecordError("Expected ',' or ']' after an array item.", fatal=True)
+                return
+    except UnicodeDecodeError as e:
+        yield RecordError(f"Invalid UTF-8: {e}", fatal=True)
@@ -0,0 +1,63 @@
+import base64
+import json
+import math
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def encode_cursor(*values):
+    """Encodes the sort key of the last item seen into an opaque cursor."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, types):
+    """
+    Decodes a cursor created by `encode_cursor` whose values must have the
+    given types, e.g. (str, int) for a (name, id) sort key.
+    Raises ValueError if the cursor is malformed or was tampered with.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    # bool is an int subclass, but never a valid sort key
+    if any(isinstance(value, bool) or not isinstance(value, kind) for value, kind in zip(values, types)):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def count_rows(stmt, mode="exact"):
+    """
+    Counts the rows of a SELECT.
+    - exact: SELECT count(*) over the statement
+    - estimate: planner estimate on PostgreSQL (no scan), exact elsewhere
+    - none: skips counting and returns None
+    """
+    if mode == "none":
+        return None
+
+    stmt = stmt.order_by(None)
+    if mode == "estimate" and db.engine.dialect.name == "postgresql":
+        compiled = stmt.compile(dialect=db.engine.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    return db.session.scalar(select(func.count()).select_from(stmt.subquery()))
+
+
+def total_pages(total, size):
+    if total is None:
+        return None
+    return math.ceil(total / size) if size else 0
@@ -0,0 +1,71 @@
+import time
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+# SQLALCHEMY_BINDS key of the read replica
+REPLICA_BIND = "replica"
+# Set after a write: reads of this client go to the primary until the given Unix time
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs of views marked with @use_replica to
+    the read replica bind. Flushes, writes, locking reads and raw SQL always
+    use the primary, as does everything outside those views.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, (sa.Select, sa.CompoundSelect))
+            and getattr(clause, "_for_update_arg", None) is None
+            and has_app_context()
+            and g.get("use_replica", False)
+        ):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_primary_requested():
+    """True when the client wrote recently (read-your-writes) and must read from the primary."""
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def use_replica(view):
+    """Routes the reads of a view to the read replica, when one is configured."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        engines = current_app.extensions["sqlalchemy"].engines
+        g.use_replica = REPLICA_BIND in engines and not read_primary_requested()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_replica(app):
+    """
+    With a replica configured (DATABASE_REPLICA_URL), successful writes set a
+    cookie that keeps the client's reads on the primary for
+    READ_YOUR_WRITES_SECONDS, so it sees its own writes despite replica lag.
+    """
+    if REPLICA_BIND not in app.config['SQLALCHEMY_BINDS']:
+        return
+
+    seconds = app.config['READ_YOUR_WRITES_SECONDS']
+
+    @app.after_request
+    def _stick_to_primary_after_write(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE, str(int(time.time()) + seconds), max_age=seconds, httponly=True, samesite="Lax"
+            )
+        return response
@@ -0,0 +1,48 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Callbacks of every timed statement: on_statement(statement, seconds) and on_error(context)
+_statement_listeners = []
+_error_listeners = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for listener in _statement_listeners:
+        listener(statement, duration)
+
+
+def _handle_error(context):
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+    for listener in _error_listeners:
+        listener(context)
+
+
+def add_statement_listener(on_statement, on_error=None):
+    """
+    Calls `on_statement(statement, seconds)` after every SQL statement of
+    every engine, and `on_error(context)` when one fails. Statements are
+    timed once by a single set of engine events (registered on first use),
+    whatever the number of listeners (metrics, SQL profiling...).
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+    if on_statement not in _statement_listeners:
+        _statement_listeners.append(on_statement)
+    if on_error is not None and on_error not in _error_listeners:
+        _error_listeners.append(on_error)
@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the backend.
+
+Run them from the `backend` folder, e.g.:
+    python -m benchmarks.tag_filter_plan --grants 1000000
+
+They use DATABASE_URL (from `.env`) unless --database-url is given.
+"""
@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def base_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Database to benchmark against (default: DATABASE_URL)",
+    )
+    return parser
+
+
+def create_bench_app(database_url):
+    """Creates the app against `database_url`, with tagging workers disabled."""
+    os.environ["DATABASE_URL"] = database_url
+
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app("production")
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=database_url,
+        TAGGING_WORKERS=0,
+    )
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            # Local runs: no migrations needed
+            db.create_all()
+    return app
+
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'seconds' key is filled when the block exits."""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def explain(stmt):
+    """Returns the execution plan of a statement as text."""
+    from app.extensions import db
+
+    compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    if db.engine.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+
+    rows = db.session.connection().exec_driver_sql(prefix + str(compiled)).all()
+    return "\n".join(" | ".join(str(value) for value in row) for row in rows)
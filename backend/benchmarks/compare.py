@@ -0,0 +1,70 @@
+"""
+Compares two benchmark result files (see benchmarks.results) and flags
+regressions: results whose median got worse by more than --threshold
+(slower, or lower throughput for higher-is-better results).
+Exits with status 1 when a regression is found, so it can gate CI.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.10
+"""
+import argparse
+import sys
+
+from benchmarks.results import format_value, load_results, result_key
+
+
+def compare(baseline, current, threshold):
+    """Returns a list of (result, baseline result, change, status) for the results in both files."""
+    baseline_results = {result_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = baseline_results.get(result_key(result))
+        if before is None:
+            continue
+
+        change = result["median"] / before["median"] - 1 if before["median"] else 0.0
+        worse = -change if result["higherIsBetter"] else change
+        if worse > threshold:
+            status = "REGRESSION"
+        elif worse < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((result, before, change, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Results file of the reference run")
+    parser.add_argument("current", help="Results file of the run to check")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Relative change of the median tolerated (default: 0.10)"
+    )
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    for label, data in (("baseline", baseline), ("current", current)):
+        env = data["environment"]
+        print(f"{label:<9} {data['suite']} @ {env['commit']} ({env['database'] or 'no database'}, {data['createdAt']})")
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"\n{'benchmark':<60}{'baseline':>20}{'current':>20}{'change':>9}  status")
+    for result, before, change, status in rows:
+        label = result["name"] + " " + " ".join(f"{key}={value}" for key, value in result["params"].items())
+        print(
+            f"{label:<60}{format_value(before['median'], before['unit']):>20}"
+            f"{format_value(result['median'], result['unit']):>20}{change:>+9.1%}  {status}"
+        )
+
+    unmatched = len(current["results"]) - len(rows)
+    if unmatched:
+        print(f"\n{unmatched} results have no baseline.")
+
+    regressions = sum(1 for *_, status in rows if status == "REGRESSION")
+    print(f"\n{regressions} regressions (threshold {args.threshold:.0%}).")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Seeded synthetic grant corpus: deterministic grants with realistic
+description lengths (log-normal, median ~600 characters) and a long-tailed
+tag distribution (Zipf-like: a few tags are very common, most are rare).
+
+Grant `i` of seed `s` is always the same, so any prefix of the corpus can
+be regenerated or extended without generating the grants before it.
+
+    python -m benchmarks.corpus --grants 100000 --seed 42
+"""
+import math
+import random
+
+from benchmarks.common import base_parser, create_bench_app, timer
+
+FILLER_WORDS = (
+    "applicants eligible funding award project proposal support program organizations activities "
+    "regional state federal application deadline matching funds budget priority review criteria "
+    "technical assistance implementation partners communities "
+    "producers businesses development services improve increase expand access "
+    "markets sustainable practices resources projects costs period years maximum minimum "
+    "requirements submit documentation plan goals outcomes impact evaluation reporting the "
+    "and for of to in with on by a an or as are be will may must should include including"
+).split()
+
+NAME_WORDS = (
+    "Regional Community Specialty Sustainable Beginning Innovation Strategic National Statewide "
+    "Development Assistance Enterprise Partnership Opportunity Improvement Expansion Initiative"
+).split()
+
+
+def tag_weights(vocabulary, exponent=1.1):
+    """Zipf-like weights: the tag of rank r is drawn ~ 1 / (r + 1) ** exponent."""
+    return [1 / (rank + 1) ** exponent for rank in range(len(vocabulary))]
+
+
+def generate_grant(index, seed=42, vocabulary=None, tags_per_grant=3.0, median_length=600, weights=None):
+    """
+    Returns grant `index` of the corpus as a dict (name, description, tags):
+    filler prose of a log-normal length with a Poisson-distributed number
+    of vocabulary tags mentioned in it. `tags` lists the mentioned tags.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    vocabulary = vocabulary or []
+
+    length = int(min(max(rng.lognormvariate(math.log(median_length), 0.6), 40), 8000))
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(FILLER_WORDS)
+        words.append(word)
+        size += len(word) + 1
+
+    # Poisson-distributed tag count (Knuth), mentioned at random positions
+    mentioned = set()
+    if vocabulary:
+        limit, count, product = math.exp(-tags_per_grant), 0, rng.random()
+        while product > limit:
+            count += 1
+            product *= rng.random()
+        weights = weights or tag_weights(vocabulary)
+        for tag in rng.choices(vocabulary, weights=weights, k=count):
+            mentioned.add(tag)
+            words.insert(rng.randrange(len(words) + 1), tag)
+
+    name = f"{' '.join(rng.sample(NAME_WORDS, 2))} Grant {seed}-{index}"
+    return {"name": name, "description": " ".join(words).capitalize() + ".", "tags": sorted(mentioned)}
+
+
+def generate_grants(count, seed=42, start=0, vocabulary=None, tags_per_grant=3.0, median_length=600):
+    """Yields grants `start` to `start + count - 1` of the corpus (see `generate_grant`)."""
+    weights = tag_weights(vocabulary) if vocabulary else None
+    for index in range(start, start + count):
+        yield generate_grant(index, seed, vocabulary, tags_per_grant, median_length, weights)
+
+
+def corpus_name_pattern(seed):
+    return f"% Grant {seed}-%"
+
+
+def seed_corpus(grants, seed=42, tags_per_grant=3.0, median_length=600, batch_size=5000, log=print):
+    """
+    Inserts the corpus of `seed` up to `grants` grants, tagged with the
+    simple tagger (the same tags the pipeline would store). Grants already
+    seeded are kept, so a 100k corpus extends a 10k one. Must be called
+    inside an app context. Returns the number of corpus grants.
+    """
+    from flask import current_app
+    from sqlalchemy import func, select, text
+
+    from app.api.models import Grant, grant_tags
+    from app.extensions import db
+    from app.services.data_version import GRANTS, bump_data_version
+    from app.services.tag_facets import rebuild_tag_counts
+    from app.services.tagging_pipeline import get_or_create_tag_ids
+    from app.services.simple_tagger import tagging_text
+    from app.services.tag_matcher import get_tag_matcher
+
+    vocabulary = current_app.config["PREDEFINED_TAGS"]
+    matcher = get_tag_matcher(vocabulary)
+    tag_ids = get_or_create_tag_ids(vocabulary)
+    db.session.commit()
+
+    existing = db.session.scalar(
+        select(func.count()).select_from(Grant).where(Grant.name.like(corpus_name_pattern(seed)))
+    )
+    if existing >= grants:
+        return existing
+
+    for start in range(existing, grants, batch_size):
+        batch = list(generate_grants(
+            min(batch_size, grants - start), seed, start, vocabulary, tags_per_grant, median_length
+        ))
+        ids = db.session.scalars(
+            Grant.__table__.insert().returning(Grant.id, sort_by_parameter_order=True),
+            [{"name": grant["name"], "description": grant["description"]} for grant in batch],
+        ).all()
+
+        rows = [
+            {"grant_id": grant_id, "tag_id": tag_ids[tag]}
+            for grant_id, grant in zip(ids, batch)
+            for tag in matcher.find(tagging_text(grant["description"], grant["name"]))
+        ]
+        if rows:
+            db.session.execute(grant_tags.insert(), rows)
+        db.session.commit()
+        log(f"Seeded {start + len(batch)} / {grants} grants.")
+
+    # Rows were inserted behind the pipeline's back
+    rebuild_tag_counts()
+    bump_data_version(GRANTS)
+    db.session.commit()
+
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(text("ANALYZE grants"))
+        db.session.execute(text("ANALYZE grant_tags"))
+        db.session.commit()
+
+    return grants
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--grants", type=int, default=100_000, help="Corpus size to seed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tags-per-grant", type=float, default=3.0, help="Mean number of tags mentioned per grant")
+    parser.add_argument("--median-length", type=int, default=600, help="Median description length (characters)")
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    with app.app_context():
+        with timer() as elapsed:
+            seed_corpus(args.grants, args.seed, args.tags_per_grant, args.median_length)
+        print(f"Corpus of {args.grants} grants ready in {elapsed['seconds']:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
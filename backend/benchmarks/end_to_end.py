@@ -0,0 +1,124 @@
+"""
+End-to-end benchmarks through the API, on the synthetic corpus
+(benchmarks.corpus) seeded at each size in turn:
+- GET /grants: no filter, name filter, common / rare tag and two tags
+- POST /grants: request latency of uploads of new grants, tagged inline
+  (TAGGING_WORKERS=0: `submit` runs each job before responding)
+- tagging: throughput of the jobs created by those uploads, from their
+  creation to their completion
+
+Query and tagging caches are disabled, so every request hits the database.
+Run it once per database (SQLite file, local PostgreSQL):
+
+    python -m benchmarks.end_to_end --sizes 10000,100000,1000000 --output sqlite.json
+    python -m benchmarks.end_to_end --database-url postgresql://localhost/grants_bench --output pg.json
+"""
+import time
+
+from benchmarks.common import base_parser, create_bench_app, timer
+from benchmarks.corpus import NAME_WORDS, corpus_name_pattern, generate_grants, seed_corpus
+from benchmarks.results import BenchmarkResults, add_output_argument, format_value
+
+
+def timed_requests(client, method, url, repeat, **kwargs):
+    """Sends the request `repeat` times (after one warm-up) and returns the latencies."""
+    getattr(client, method)(url, **kwargs)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        samples.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method.upper()} {url} failed: {response.status_code} {response.get_data(as_text=True)}")
+    return samples
+
+
+def get_grants_cases(vocabulary):
+    return {
+        "none": "/api/v1/grants",
+        "name": f"/api/v1/grants?name={NAME_WORDS[1]}",
+        "common_tag": f"/api/v1/grants?tag={vocabulary[0]}",
+        "rare_tag": f"/api/v1/grants?tag={vocabulary[len(vocabulary) // 2]}",
+        "two_tags": f"/api/v1/grants?tag={vocabulary[0]}&tag={vocabulary[1]}",
+    }
+
+
+def report(result):
+    print(f"  {result['name']:<22}{str(result['params']):<60}median {format_value(result['median'], result['unit'])}")
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated corpus sizes (e.g. 10000,100000,1000000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=20, help="GET requests per case")
+    parser.add_argument("--posts", type=int, default=5, help="POST /grants requests per size")
+    parser.add_argument("--post-batch", type=int, default=500, help="Grants per POST /grants")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    app.config.update(TAGGING_METHOD="simple", TAG_CACHE_BACKEND="none", QUERY_CACHE_BACKEND="none")
+
+    client = app.test_client()
+    vocabulary = app.config["PREDEFINED_TAGS"]
+
+    with app.app_context():
+        from sqlalchemy import func, select
+
+        from app.api.models import Grant, TaggingJob
+        from app.extensions import db
+
+        results = BenchmarkResults("end_to_end", database=db.engine.dialect.name)
+        # Uploads use another corpus seed, continued across runs so names are always new
+        upload_seed = args.seed + 1
+        uploaded = db.session.scalar(
+            select(func.count()).select_from(Grant).where(Grant.name.like(corpus_name_pattern(upload_seed)))
+        )
+
+        for size in sorted(int(value) for value in args.sizes.split(",")):
+            with timer() as elapsed:
+                seed_corpus(size, args.seed, log=lambda message: None)
+            print(f"\n=== {size} grants ({results.environment['database']}, seeded in {elapsed['seconds']:.1f}s) ===")
+
+            # --- GET /grants ---
+            for case, url in get_grants_cases(vocabulary).items():
+                samples = timed_requests(client, "get", url, args.requests)
+                report(results.add("get_grants", samples, {"grants": size, "filter": case}))
+
+            # --- POST /grants ---
+            job_ids = []
+            samples = []
+            for _ in range(args.posts):
+                payload = [
+                    {"name": grant["name"], "description": grant["description"]}
+                    for grant in generate_grants(args.post_batch, upload_seed, uploaded, vocabulary)
+                ]
+                uploaded += args.post_batch
+
+                start = time.perf_counter()
+                response = client.post("/api/v1/grants", json=payload)
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 201:
+                    raise RuntimeError(f"POST /grants failed: {response.status_code} {response.get_data(as_text=True)}")
+                job_ids.append(int(response.headers["Location"].rsplit("/", 1)[1]))
+            report(results.add("post_grants", samples, {"grants": size, "batch": args.post_batch}))
+
+            # --- Tagging ---
+            samples = []
+            for job_id in job_ids:
+                job = db.session.get(TaggingJob, job_id)
+                if job.status != "completed":
+                    raise RuntimeError(f"Tagging job {job_id} is {job.status}")
+                samples.append(job.total / (job.updated_at - job.created_at).total_seconds())
+            report(results.add(
+                "background_tagging", samples, {"grants": size, "batch": args.post_batch},
+                unit="grants/s", higher_is_better=True,
+            ))
+
+    if args.output:
+        results.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
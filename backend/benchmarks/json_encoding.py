@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of the API response layer: encode time of a large
+Page<Grant> envelope with the stdlib vs. orjson providers, and bytes on the
+wire without compression, with gzip and with brotli.
+
+    python -m benchmarks.json_encoding --items 100 --description-length 2000
+"""
+import argparse
+import datetime
+import gzip
+import json
+import random
+import string
+import timeit
+
+from app.utils.compression import brotli
+from app.utils.json_provider import orjson
+
+
+def build_page(items, description_length, seed=42):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(500)]
+
+    def description():
+        text = []
+        while sum(len(word) + 1 for word in text) < description_length:
+            text.append(rng.choice(words))
+        return " ".join(text)
+
+    content = [
+        {
+            "id": index + 1,
+            "name": f"Grant program {index + 1}",
+            "description": description(),
+            "tags": rng.sample(["rural", "water", "soil", "energy", "youth", "grazing", "dairy"], k=3),
+        }
+        for index in range(items)
+    ]
+    return {
+        "status": "SUCCESS",
+        "statusCode": 200,
+        "message": "Grants retrieved successfully",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "path": "/api/v1/grants",
+        "data": {
+            "content": content,
+            "pageNo": 0,
+            "pageSize": items,
+            "totalElements": items,
+            "totalPages": 1,
+            "last": True,
+        },
+        "errorCode": None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100, help="Grants per page")
+    parser.add_argument("--description-length", type=int, default=2000, help="Characters per description")
+    parser.add_argument("--number", type=int, default=200, help="Encodes per timing")
+    args = parser.parse_args()
+
+    payload = build_page(args.items, args.description_length)
+
+    encoders = {
+        # Same arguments as Flask's DefaultJSONProvider out of debug mode
+        "stdlib json": lambda: json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8"),
+    }
+    if orjson is not None:
+        encoders["orjson"] = lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+
+    print(f"Page of {args.items} grants, ~{args.description_length} chars per description\n")
+    print(f"{'encoder':<14}{'ms / encode':>14}")
+    for name, encode in encoders.items():
+        seconds = min(timeit.repeat(encode, number=args.number, repeat=3)) / args.number
+        print(f"{name:<14}{seconds * 1000:>14.3f}")
+
+    body = encoders["stdlib json"]()
+    print(f"\n{'encoding':<14}{'bytes':>12}{'ms / compress':>16}")
+    print(f"{'identity':<14}{len(body):>12}{'-':>16}")
+
+    compressors = {"gzip (6)": lambda: gzip.compress(body, compresslevel=6)}
+    if brotli is not None:
+        compressors["brotli (5)"] = lambda: brotli.compress(body, quality=5)
+    for name, compress in compressors.items():
+        seconds = min(timeit.repeat(compress, number=20, repeat=3)) / 20
+        print(f"{name:<14}{len(compress()):>12}{seconds * 1000:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
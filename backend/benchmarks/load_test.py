@@ -0,0 +1,372 @@
+"""
+Load generator for a running instance of the API. Closed-loop clients
+send a weighted mix of requests (readers paging, filtering and searching
+GET /grants, uploaders starting tagging jobs with POST /grants) for a
+fixed duration; the server's /metrics is sampled meanwhile.
+
+Run the app under a multi-worker WSGI server against a seeded database
+(e.g. `python -m benchmarks.corpus --grants 100000`), then:
+
+    gunicorn --workers 4 --threads 4 --bind 127.0.0.1:8000 run:app
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --scenario mixed --concurrency 32 --duration 60
+
+Reports p50/p95/p99 latency, throughput and error rate per request type,
+and a timeline of throughput, DB connection-pool waits and tagging backlog.
+"""
+import argparse
+import http.client
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter, defaultdict
+
+from app.services.predefined_tags import TAG_LIST
+from benchmarks.corpus import NAME_WORDS, generate_grants, tag_weights
+from benchmarks.results import BenchmarkResults, add_output_argument
+
+SCENARIOS = {
+    "read": {"list": 50, "filter": 30, "search": 10, "detail": 10},
+    "mixed": {"list": 40, "filter": 25, "search": 10, "detail": 10, "upload": 15},
+    "ingest": {"list": 20, "filter": 10, "upload": 70},
+}
+
+SEARCH_WORDS = ("funding", "producers", "technical assistance", "markets", "development")
+
+# Pool checkouts slower than this count as waits in the timeline
+POOL_WAIT_THRESHOLD = "0.01"
+
+_SAMPLE = re.compile(r"^([a-zA-Z_:][\w:]*)(?:\{(.*)\})? (\S+)$")
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_mix(value):
+    """'list=60,upload=40' -> {'list': 60, 'upload': 40}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown request type '{name}' (one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+def parse_metrics(text):
+    """Parses the Prometheus text format into {(name, ((label, value), ...)): value}."""
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[(name, tuple(_LABEL.findall(labels or "")))] = float(value)
+    return samples
+
+
+# --- Request types ---
+
+class LoadContext:
+    """State shared by the clients: the corpus size and the upload counter."""
+
+    def __init__(self, max_grant_id, upload_batch, seed):
+        self.max_grant_id = max(max_grant_id, 1)
+        self.upload_batch = upload_batch
+        self.upload_seed = seed
+        self._uploaded = 0
+        self._lock = threading.Lock()
+        self.tag_weights = tag_weights(TAG_LIST)
+
+    def next_upload(self):
+        with self._lock:
+            start = self._uploaded
+            self._uploaded += self.upload_batch
+        return start
+
+
+def _list(context, rng):
+    return "GET", f"/api/v1/grants?page={rng.randint(0, 49)}&size=20", None
+
+
+def _filter(context, rng):
+    if rng.random() < 0.2:
+        return "GET", f"/api/v1/grants?name={rng.choice(NAME_WORDS)}", None
+    tags = rng.choices(TAG_LIST, weights=context.tag_weights, k=rng.choice((1, 1, 2)))
+    return "GET", "/api/v1/grants?" + urllib.parse.urlencode([("tag", tag) for tag in tags]), None
+
+
+def _search(context, rng):
+    return "GET", "/api/v1/grants?" + urllib.parse.urlencode({"q": rng.choice(SEARCH_WORDS)}), None
+
+
+def _detail(context, rng):
+    return "GET", f"/api/v1/grants/{rng.randint(1, context.max_grant_id)}", None
+
+
+def _upload(context, rng):
+    grants = generate_grants(context.upload_batch, context.upload_seed, context.next_upload(), TAG_LIST)
+    body = [{"name": grant["name"], "description": grant["description"]} for grant in grants]
+    return "POST", "/api/v1/grants", json.dumps(body).encode("utf-8")
+
+
+OPERATIONS = {"list": _list, "filter": _filter, "search": _search, "detail": _detail, "upload": _upload}
+
+
+# --- Clients ---
+
+class Connection:
+    """Keep-alive HTTP connection, reopened after an error."""
+
+    def __init__(self, url, timeout, accept_encoding="gzip"):
+        self.accept_encoding = accept_encoding
+        parsed = urllib.parse.urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self._connect = lambda: connection_class(parsed.netloc, timeout=timeout)
+        self._connection = None
+
+    def request(self, method, path, body=None):
+        """Returns (status, body); raises on connection errors."""
+        if self._connection is None:
+            self._connection = self._connect()
+        headers = {"Accept-Encoding": self.accept_encoding}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        try:
+            self._connection.request(method, path, body=body, headers=headers)
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def run_client(url, context, operations, weights, deadline, start_at, timeout, seed, records):
+    rng = random.Random(seed)
+    connection = Connection(url, timeout)
+    time.sleep(max(start_at - time.perf_counter(), 0)) # Ramp-up
+
+    while time.perf_counter() < deadline:
+        name = rng.choices(operations, weights=weights)[0]
+        method, path, body = OPERATIONS[name](context, rng)
+        start = time.perf_counter()
+        try:
+            status, _ = connection.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            status = 0 # Connection error / timeout
+        end = time.perf_counter()
+        records.append((end, name, end - start, status))
+
+
+def is_error(name, status):
+    # Random detail IDs may not exist: a 404 there is expected
+    return status == 0 or status >= 500 or (status >= 400 and not (name == "detail" and status == 404))
+
+
+# --- Server-side sampling (/metrics) ---
+
+class MetricsSampler:
+    """
+    Samples /metrics every `interval` seconds. Metrics are per process, and
+    each scrape reaches one worker: the latest values of every process seen
+    (keyed by the pid label of process_start_time_seconds) are summed, over
+    every DB bind (primary and replica pools).
+    """
+
+    def __init__(self, url, interval, scrapes, timeout):
+        self.connection = Connection(url, timeout, accept_encoding="identity")
+        self.interval = interval
+        self.scrapes = scrapes
+        self.processes = {}
+        self.backlog = None
+        self.rows = []
+        self.available = True
+
+    def scrape(self):
+        for _ in range(self.scrapes):
+            try:
+                status, body = self.connection.request("GET", "/metrics")
+            except (OSError, http.client.HTTPException):
+                continue
+            finally:
+                # A kept-alive connection always reaches the same worker
+                self.connection.close()
+            if status != 200:
+                self.available = False
+                return
+            samples = parse_metrics(body.decode("utf-8"))
+            pid = next((labels for name, labels in samples if name == "process_start_time_seconds"), None)
+            self.processes[pid] = samples
+            self.backlog = samples.get(("tagging_backlog_grants", ()), self.backlog)
+
+    def totals(self):
+        def total(name, labels=()):
+            """Sum of the samples of `name` having `labels` (any other labels, e.g. bind, are summed over)."""
+            return sum(
+                value
+                for samples in self.processes.values()
+                for (sample_name, sample_labels), value in samples.items()
+                if sample_name == name and set(labels) <= set(sample_labels)
+            )
+
+        checkouts = total("db_pool_checkout_seconds_count")
+        return {
+            "checkouts": checkouts,
+            "checkout_seconds": total("db_pool_checkout_seconds_sum"),
+            "waits": checkouts - total("db_pool_checkout_seconds_bucket", (("le", POOL_WAIT_THRESHOLD),)),
+            "checked_out": total("db_pool_connections", (("state", "checked_out"),)),
+        }
+
+    def run(self, started, deadline, records):
+        self.scrape()
+        previous = self.totals()
+        previous_count = 0
+        next_at = started + self.interval
+        while self.available and next_at <= deadline + self.interval:
+            time.sleep(max(next_at - time.perf_counter(), 0))
+            self.scrape()
+            current = self.totals()
+
+            # Requests completed during the interval
+            done = records[previous_count:]
+            previous_count += len(done)
+            latencies = sorted(latency for _, _, latency, _ in done)
+            checkouts = current["checkouts"] - previous["checkouts"]
+            self.rows.append({
+                "elapsed": round(next_at - started, 1),
+                "requestsPerSecond": len(done) / self.interval,
+                "p95": percentile(latencies, 0.95),
+                "errors": sum(1 for _, name, _, status in done if is_error(name, status)),
+                "poolCheckedOut": current["checked_out"],
+                "poolWaits": current["waits"] - previous["waits"],
+                "poolCheckoutMean": (
+                    (current["checkout_seconds"] - previous["checkout_seconds"]) / checkouts if checkouts else 0.0
+                ),
+                "taggingBacklog": self.backlog,
+            })
+            previous = current
+            next_at += self.interval
+
+
+def grant_count(url, timeout):
+    status, body = Connection(url, timeout).request("GET", "/api/v1/grants?size=1")
+    if status != 200:
+        raise SystemExit(f"GET /api/v1/grants returned {status}: is the API running at {url}?")
+    return json.loads(body)["data"]["totalElements"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed", help="Predefined request mix")
+    parser.add_argument("--mix", type=parse_mix, help="Custom request mix, e.g. list=60,filter=20,upload=20")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--ramp-up", type=float, default=0, help="Seconds over which the clients start")
+    parser.add_argument("--upload-batch", type=int, default=100, help="Grants per POST /grants")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between /metrics samples")
+    parser.add_argument("--scrapes", type=int, default=4, help="/metrics requests per sample (to reach every worker)")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout (seconds)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (default: time-based, so uploads are new)")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    mix = args.mix or SCENARIOS[args.scenario]
+    seed = args.seed if args.seed is not None else int(time.time())
+    context = LoadContext(grant_count(args.url, args.timeout), args.upload_batch, seed)
+    operations = list(mix)
+    weights = [mix[name] for name in operations]
+
+    print(f"{args.concurrency} clients for {args.duration:.0f}s against {args.url}, mix {mix}")
+    print(f"Corpus: {context.max_grant_id} grants, uploads of {args.upload_batch} grants (seed {seed})\n")
+
+    records = [] # list.append is atomic: shared by every client
+    started = time.perf_counter()
+    deadline = started + args.ramp_up + args.duration
+    clients = [
+        threading.Thread(
+            target=run_client,
+            args=(
+                args.url, context, operations, weights, deadline,
+                started + args.ramp_up * index / args.concurrency, args.timeout, seed * 1000 + index, records,
+            ),
+            daemon=True,
+        )
+        for index in range(args.concurrency)
+    ]
+    sampler = MetricsSampler(args.url, args.interval, args.scrapes, args.timeout)
+    sampler_thread = threading.Thread(target=sampler.run, args=(started, deadline, records), daemon=True)
+
+    for thread in clients + [sampler_thread]:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    sampler_thread.join(timeout=args.interval * 2)
+
+    # --- Timeline ---
+    if sampler.rows:
+        print(f"{'t (s)':>7}{'req/s':>9}{'p95 ms':>9}{'errors':>8}{'pool busy':>11}{'pool waits':>12}"
+              f"{'checkout ms':>13}{'backlog':>9}")
+        for row in sampler.rows:
+            backlog = "-" if row["taggingBacklog"] is None else f"{row['taggingBacklog']:.0f}"
+            print(
+                f"{row['elapsed']:>7.1f}{row['requestsPerSecond']:>9.1f}{row['p95'] * 1000:>9.1f}{row['errors']:>8}"
+                f"{row['poolCheckedOut']:>11.0f}{row['poolWaits']:>12.0f}{row['poolCheckoutMean'] * 1000:>13.2f}"
+                f"{backlog:>9}"
+            )
+        print(f"(pool waits: checkouts slower than {float(POOL_WAIT_THRESHOLD) * 1000:.0f} ms)\n")
+    elif not sampler.available:
+        print("/metrics is not available (METRICS_ENABLED=false): no server-side timeline.\n")
+
+    # --- Summary per request type ---
+    results = BenchmarkResults("load_test")
+    results.extras = {"scenario": mix, "concurrency": args.concurrency, "timeline": sampler.rows}
+    by_operation = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for _, name, latency, status in records:
+        by_operation[name].append(latency)
+        statuses[name][status] += 1
+
+    print(f"{'request':<10}{'count':>8}{'req/s':>9}{'errors':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  statuses")
+    for name in operations + ["total"]:
+        if name == "total":
+            latencies = sorted(latency for _, _, latency, _ in records)
+            counts = sum(statuses.values(), Counter())
+            errors = sum(1 for _, op, _, status in records if is_error(op, status))
+        else:
+            latencies = sorted(by_operation[name])
+            counts = statuses[name]
+            errors = sum(count for status, count in counts.items() if is_error(name, status))
+        if not latencies:
+            continue
+
+        print(
+            f"{name:<10}{len(latencies):>8}{len(latencies) / elapsed:>9.1f}{errors / len(latencies):>9.1%}"
+            f"{percentile(latencies, 0.50) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}"
+            f"{percentile(latencies, 0.99) * 1000:>9.1f}{latencies[-1] * 1000:>9.1f}  "
+            + " ".join(f"{status or 'conn'}:{count}" for status, count in sorted(counts.items()))
+        )
+        params = {"request": name, "concurrency": args.concurrency}
+        results.add("load.latency", latencies, params)
+        results.add("load.throughput", [len(latencies) / elapsed], params, unit="req/s", higher_is_better=True)
+        results.add("load.error_rate", [errors / len(latencies)], params, unit="ratio")
+
+    if args.output:
+        results.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+JSON results format shared by the benchmarks (--output results.json):
+
+    {
+      "format": 1,
+      "suite": "end_to_end",
+      "createdAt": "2025-01-01T12:00:00+00:00",
+      "environment": {"python": "3.12.1", "platform": "...", "database": "postgresql", "commit": "abc1234"},
+      "results": [
+        {"name": "get_grants", "params": {"grants": 100000, "filter": "tag"},
+         "unit": "s", "higherIsBetter": false, "samples": [...],
+         "min": ..., "median": ..., "mean": ..., "stdev": ...}
+      ]
+    }
+
+A result is identified by its name and params; `benchmarks.compare`
+matches results of two files on that key and compares their medians.
+"""
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+
+FORMAT_VERSION = 1
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def add_output_argument(parser):
+    parser.add_argument("--output", help="Write the results to this JSON file (see benchmarks.results)")
+    return parser
+
+
+class BenchmarkResults:
+    """Results of one benchmark run, written in the format above."""
+
+    def __init__(self, suite, database=None):
+        self.suite = suite
+        self.environment = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database,
+            "commit": git_commit(),
+        }
+        self.results = []
+        # Suite-specific top-level keys (e.g. the load test's timeline)
+        self.extras = {}
+
+    def add(self, name, samples, params=None, unit="s", higher_is_better=False):
+        """Records the samples of one measurement and returns its summary."""
+        samples = list(samples)
+        result = {
+            "name": name,
+            "params": params or {},
+            "unit": unit,
+            "higherIsBetter": higher_is_better,
+            "samples": samples,
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+        self.results.append(result)
+        return result
+
+    def to_dict(self):
+        return {
+            "format": FORMAT_VERSION,
+            "suite": self.suite,
+            "createdAt": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "environment": self.environment,
+            "results": self.results,
+            **self.extras,
+        }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Results written to {path}.")
+
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported results format {data.get('format')!r}")
+    return data
+
+
+def format_value(value, unit):
+    if unit == "s":
+        return f"{value * 1000:.3f} ms" if value < 1 else f"{value:.3f} s"
+    return f"{value:,.1f} {unit}"
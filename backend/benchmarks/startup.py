@@ -0,0 +1,84 @@
+"""
+Cold-start benchmark of `create_app`: each sample runs in a fresh Python
+process, so it includes every import (Flask, SQLAlchemy, the tagger
+backends...) as a new gunicorn worker or `flask` CLI command pays it.
+Measured per TAGGING_METHOD, with and without tagger warm-up, and reports
+which heavy optional modules (e.g. openai) ended up imported.
+
+    python -m benchmarks.startup --runs 10 --methods simple,llm --output startup.json
+"""
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import base_parser
+from benchmarks.results import BenchmarkResults, add_output_argument, format_value
+
+# Modules that only some tagger backends need
+OPTIONAL_MODULES = ("openai", "httpx")
+
+# Run in the child process; prints one JSON line with the timings
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "create_app": done - imported,
+    "total": done - start,
+    "modules": [name for name in sys.argv[2:] if name in sys.modules],
+}))
+"""
+
+
+def run_once(config_name, env):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, config_name, *OPTIONAL_MODULES],
+        capture_output=True, text=True, check=True, env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--runs", type=int, default=10, help="Fresh processes per case")
+    parser.add_argument("--methods", default="simple,llm", help="Comma-separated TAGGING_METHOD values")
+    parser.add_argument("--config", default="production", help="Config name passed to create_app")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    results = BenchmarkResults("startup")
+    for method in args.methods.split(","):
+        for warmup in (True, False):
+            env = dict(
+                os.environ,
+                TAGGING_METHOD=method,
+                TAGGER_WARMUP=str(warmup).lower(),
+                # The LLM engine starts without sending any request, so a placeholder key is enough
+                OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY") or "benchmark",
+            )
+            if args.database_url:
+                env["DATABASE_URL"] = args.database_url
+
+            run_once(args.config, env) # Warm the OS file cache and the .pyc files
+            runs = [run_once(args.config, env) for _ in range(args.runs)]
+
+            params = {"method": method, "warmup": warmup}
+            for phase in ("import", "create_app", "total"):
+                result = results.add(f"startup_{phase}", [run[phase] for run in runs], params)
+                print(
+                    f"  {result['name']:<20}{str(params):<40}"
+                    f"median {format_value(result['median'], 's'):>12}  min {format_value(result['min'], 's'):>12}"
+                )
+            print(f"  {'imported':<20}{str(params):<40}{', '.join(runs[-1]['modules']) or '-'}")
+
+    if args.output:
+        results.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the ways of computing tag facet counts (GET /tags/facets):
+- global counts: GROUP BY over grant_tags vs. the tag_counts summary table
+- filtered counts: tags co-occurring with a tag filter
+  (app.services.tag_facets.filtered_tag_facets)
+
+    python -m benchmarks.tag_facets --grants 1000000 --tag rural
+"""
+from sqlalchemy import func, select
+
+from benchmarks.common import base_parser, create_bench_app, explain, timer
+from benchmarks.corpus import seed_corpus
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        with timer() as elapsed:
+            result = function()
+        timings.append(elapsed["seconds"])
+    return min(timings), result
+
+
+def group_by_facets():
+    """Baseline: aggregate the whole grant_tags table on every request."""
+    from app.api.models import Tag, grant_tags
+    from app.extensions import db
+
+    count = func.count().label("count")
+    stmt = (
+        select(Tag.name, count)
+        .select_from(grant_tags.join(Tag, Tag.id == grant_tags.c.tag_id))
+        .group_by(Tag.id, Tag.name)
+        .order_by(count.desc(), Tag.name.asc())
+    )
+    return stmt, lambda: db.session.execute(stmt).all()
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--grants", type=int, default=1_000_000, help="Corpus size to seed")
+    parser.add_argument("--tag", action="append", dest="tags", help="Tag filter of the filtered facets (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    tags = args.tags or ["rural"]
+
+    app = create_bench_app(args.database_url)
+    with app.app_context():
+        from app.api.models import Grant
+        from app.services.grant_filters import apply_tag_filter
+        from app.services.tag_facets import filtered_tag_facets, global_tag_facets
+
+        print(f"Seeding up to {args.grants} grants...")
+        with timer() as elapsed:
+            seed_corpus(args.grants, log=lambda message: None)
+        print(f"Corpus ready in {elapsed['seconds']:.1f}s.")
+
+        stmt, run_group_by = group_by_facets()
+        group_by_seconds, group_by_rows = best_of(args.repeat, run_group_by)
+        summary_seconds, summary_rows = best_of(args.repeat, global_tag_facets)
+
+        print(f"\n=== Global facets, best of {args.repeat} ===")
+        print(f"GROUP BY grant_tags:  {group_by_seconds * 1000:9.1f} ms")
+        print(f"tag_counts summary:   {summary_seconds * 1000:9.1f} ms  ({group_by_seconds / summary_seconds:.0f}x)")
+        same = {name: count for name, count in group_by_rows} == {
+            row["name"]: row["count"] for row in summary_rows if row["count"]
+        }
+        print(f"Same counts: {same}")
+        print("--- GROUP BY plan ---")
+        print(explain(stmt))
+
+        query = apply_tag_filter(Grant.query, tags)
+        filtered_seconds, filtered_rows = best_of(args.repeat, lambda: filtered_tag_facets(query))
+        matching = next((row["count"] for row in filtered_rows if row["name"] == tags[0]), 0)
+
+        print(f"\n=== Facets of the grants tagged {tags} ({matching} grants), best of {args.repeat} ===")
+        print(f"{filtered_seconds * 1000:.1f} ms")
+        for row in filtered_rows[:10]:
+            print(f"  {row['name']:<30}{row['count']:>10}")
+
+
+if __name__ == "__main__":
+    main()
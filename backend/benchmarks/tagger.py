@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of the simple tagger (simple_tagger.tag_many) across
+vocabulary sizes: time to compile the tag matcher and time per grant on
+texts of the synthetic corpus (benchmarks.corpus). No database needed.
+
+    python -m benchmarks.tagger --vocabulary-sizes 10,100,1000,10000 --output tagger.json
+"""
+import argparse
+import random
+import timeit
+from types import SimpleNamespace
+
+from app.services.predefined_tags import TAG_LIST
+from app.services.simple_tagger import tag_many
+from app.services.tag_matcher import TagMatcher, get_tag_matcher
+from benchmarks.corpus import generate_grants
+from benchmarks.results import BenchmarkResults, add_output_argument
+
+
+def build_vocabulary(size, seed=42):
+    """The predefined tags, padded with pronounceable synthetic tags (some hyphenated) up to `size`."""
+    rng = random.Random(seed)
+    vocabulary = list(TAG_LIST[:size])
+    seen = set(vocabulary)
+
+    def word():
+        return "".join(rng.choice("bcdfgklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+
+    while len(vocabulary) < size:
+        tag = word() if rng.random() < 0.7 else f"{word()}-{word()}"
+        if tag not in seen:
+            seen.add(tag)
+            vocabulary.append(tag)
+    return vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--vocabulary-sizes", default="10,100,1000,10000", help="Comma-separated vocabulary sizes"
+    )
+    parser.add_argument("--texts", type=int, default=2000, help="Corpus grants tagged per timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    grants = [
+        SimpleNamespace(id=index, **grant)
+        for index, grant in enumerate(generate_grants(args.texts, args.seed, vocabulary=TAG_LIST))
+    ]
+    results = BenchmarkResults("tagger")
+
+    print(f"{len(grants)} corpus grants, best / median of {args.repeat}\n")
+    print(f"{'vocabulary':>10}{'compile ms':>14}{'µs / grant':>14}{'grants / s':>14}{'tags / grant':>14}")
+    for size in (int(value) for value in args.vocabulary_sizes.split(",")):
+        vocabulary = build_vocabulary(size, args.seed)
+
+        compile_samples = timeit.repeat(lambda: TagMatcher(vocabulary), number=1, repeat=args.repeat)
+        results.add("tagger.compile", compile_samples, {"vocabulary": size})
+
+        get_tag_matcher(vocabulary) # Compiled once, as in the app
+
+        def tag_all():
+            return sum(len(tags) for tags in tag_many(grants, vocabulary).values())
+
+        tags_found = tag_all()
+        match_samples = [
+            seconds / len(grants) for seconds in timeit.repeat(tag_all, number=1, repeat=args.repeat)
+        ]
+        result = results.add("tagger.match", match_samples, {"vocabulary": size, "texts": len(grants)})
+
+        print(
+            f"{size:>10}{min(compile_samples) * 1000:>14.2f}{result['median'] * 1e6:>14.1f}"
+            f"{1 / result['median']:>14,.0f}{tags_found / len(grants):>14.2f}"
+        )
+
+    if args.output:
+        results.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
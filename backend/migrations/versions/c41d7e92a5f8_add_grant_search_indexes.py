@@ -0,0 +1,76 @@
+"""add grant search indexes (pg_trgm, tsvector / FTS5)
+
+Revision ID: c41d7e92a5f8
+Revises: 8b2e6f4a9c31
+Create Date: 2026-10-17 12:05:51.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e92a5f8'
+down_revision = '8b2e6f4a9c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Trigram index: lets `name ILIKE '%...%'` use an index instead of a sequential scan
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_grants_name_trgm ON grants USING gin (name gin_trgm_ops)"
+        )
+
+        # Full-text search over name (weight A) + description (weight B)
+        op.execute(
+            "ALTER TABLE grants ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_grants_search_vector ON grants USING gin (search_vector)"
+        )
+
+    elif dialect == 'sqlite':
+        # Local fallback: FTS5 external-content table kept in sync by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS grants_fts USING fts5("
+            "name, description, content='grants', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS grants_fts_ai AFTER INSERT ON grants BEGIN "
+            "INSERT INTO grants_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS grants_fts_ad AFTER DELETE ON grants BEGIN "
+            "INSERT INTO grants_fts(grants_fts, rowid, name, description) "
+            "VALUES ('delete', old.id, old.name, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS grants_fts_au AFTER UPDATE ON grants BEGIN "
+            "INSERT INTO grants_fts(grants_fts, rowid, name, description) "
+            "VALUES ('delete', old.id, old.name, old.description); "
+            "INSERT INTO grants_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+        )
+        op.execute("INSERT INTO grants_fts(grants_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_grants_search_vector")
+        op.execute("ALTER TABLE grants DROP COLUMN IF EXISTS search_vector")
+        op.execute("DROP INDEX IF EXISTS ix_grants_name_trgm")
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS grants_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS grants_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS grants_fts_ai")
+        op.execute("DROP TABLE IF EXISTS grants_fts")
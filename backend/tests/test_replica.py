@@ -0,0 +1,72 @@
+"""
+Read replica routing (app.utils.replica) against two SQLite databases: the
+replica holds a grant the primary does not have, so each read shows which
+database served it.
+
+    python -m pytest tests
+"""
+import pytest
+
+from app import create_app
+from app.api.models import Grant, Tag, grant_tags
+from app.config import ProductionConfig, config
+from app.extensions import db
+from app.utils.replica import READ_PRIMARY_COOKIE
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    class ReplicaTestConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {"replica": {"url": f"sqlite:///{tmp_path / 'replica.db'}"}}
+        TAGGING_METHOD = "simple"
+        TAGGING_WORKERS = 0
+        TAG_CACHE_BACKEND = "none"
+        QUERY_CACHE_BACKEND = "none"
+        METRICS_ENABLED = False
+
+    monkeypatch.setitem(config, "replica_test", ReplicaTestConfig)
+    app = create_app("replica_test")
+
+    with app.app_context():
+        db.create_all()
+        replica = db.engines["replica"]
+        db.metadata.create_all(replica)
+        with replica.begin() as connection:
+            connection.execute(Grant.__table__.insert(), {"id": 1, "name": "Solar farm", "description": "Solar panels"})
+            connection.execute(Tag.__table__.insert(), {"id": 1, "name": "energy"})
+            connection.execute(grant_tags.insert(), {"grant_id": 1, "tag_id": 1})
+
+    return app.test_client()
+
+
+def names(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [grant["name"] for grant in response.get_json()["data"]["content"]]
+
+
+def test_reads_are_served_by_the_replica(client):
+    assert names(client.get("/api/v1/grants")) == ["Solar farm"]
+    assert names(client.get("/api/v1/grants?q=solar")) == ["Solar farm"]
+    assert names(client.get("/api/v1/grants?tag=energy")) == ["Solar farm"]
+
+    response = client.get("/api/v1/grants/1")
+    assert response.status_code == 200
+    assert response.get_json()["data"]["tags"] == ["energy"]
+
+
+def test_reads_after_a_write_are_served_by_the_primary(client):
+    response = client.post("/api/v1/grants", json=[{"name": "Rural water", "description": "Water for rural farms"}])
+    assert response.status_code == 201
+    assert client.get_cookie(READ_PRIMARY_COOKIE) is not None
+
+    assert names(client.get("/api/v1/grants")) == ["Rural water"]
+    assert names(client.get("/api/v1/grants?q=water")) == ["Rural water"]
+    assert names(client.get("/api/v1/grants?tag=water")) == ["Rural water"]
+    assert client.get("/api/v1/grants/1").get_json()["data"]["name"] == "Rural water"
+
+    # Without the cookie, the same reads go back to the replica
+    client.delete_cookie(READ_PRIMARY_COOKIE)
+    assert names(client.get("/api/v1/grants?q=solar")) == ["Solar farm"]
+    assert names(client.get("/api/v1/grants?q=water")) == []
@@ -6,6 +6,8 @@ export interface Page<T> {
   totalElements: number;
   totalPages: number;
   last: boolean;
+  // Opaque keyset cursor for the next page (send it back as ?cursor=...)
+  nextCursor?: string | null;
 }
 
 // Base interface for all API responses